@@ -0,0 +1,272 @@
+# reddit-persona-pro/benchmarks/run_benchmark.py
+"""
+End-to-end pipeline benchmark against local Reddit/OpenAI stand-ins.
+
+    python -m benchmarks.run_benchmark --quick
+    python -m benchmarks.run_benchmark --sizes 10,100,500,2000 --users 1,10,100
+    python -m benchmarks.run_benchmark --update-baseline
+
+The real PersonaPipeline (preprocessing, sampling, NLP models, persona engine)
+runs unchanged; only the network endpoints are local. Results are written as
+JSON and compared against a stored baseline; the exit code is non-zero on a
+regression or when a user exceeds the per-user memory budget.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.stub_servers import serve
+from persona.memory import PeakMemory, PEAK_MB_PER_USER, peak_rss_mb
+from persona.pipeline import PersonaPipeline, DEFAULT_TIER, STAGES
+from persona.reddit_fetcher import RedditFetcher
+from persona.sampler import SAMPLING_TIERS
+from persona.inference_backends import BACKENDS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+FULL_SIZES = [10, 100, 500, 2000]
+FULL_USERS = [1, 10, 100]
+QUICK_SIZES = [10, 100]
+QUICK_USERS = [1, 10]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        'p50': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'mean': statistics.fmean(ordered),
+        'max': ordered[-1],
+    }
+
+
+async def _wait_until_up(url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{url}/user/probe/about") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Stub server at {url} did not start")
+            await asyncio.sleep(0.1)
+
+
+async def run_scenario(pipeline: PersonaPipeline, url: str, n_items: int, n_users: int, render: bool) -> Dict:
+    stage_samples = {stage: [] for stage in STAGES}
+    totals, traced, peaks = [], [], []
+    busy = 0.0
+    fetched = 0
+
+    async with aiohttp.ClientSession() as session:
+        for u in range(n_users):
+            username = f"bench{u}__{n_items}"
+            async with session.post(f"{url}/_bench/prepare/{username}") as response:
+                await response.read()
+
+            with PeakMemory() as peak:
+                start = time.perf_counter()
+                if render:
+                    await pipeline.run(username)
+                else:
+                    await pipeline.build(username)
+                elapsed = time.perf_counter() - start
+
+            busy += elapsed
+            # The fetcher caps each listing at 1000 items, so count what was actually fetched
+            fetched += (pipeline.last_activity or {}).get('total', 0)
+            totals.append(elapsed)
+            traced.append(peak.traced_mb)
+            peaks.append(peak.peak_mb)
+            for stage, seconds in pipeline.last_timings.items():
+                stage_samples[stage].append(seconds)
+
+    latency = {'total': _summarize(totals)}
+    latency.update({stage: _summarize(samples) for stage, samples in stage_samples.items() if samples})
+    return {
+        'items_per_user': n_items,
+        'users': n_users,
+        'items_fetched': fetched,
+        'busy_s': busy,
+        'users_per_s': n_users / busy if busy else 0.0,
+        'items_per_s': fetched / busy if busy else 0.0,
+        'latency_s': latency,
+        'peak_traced_mb_max': max(traced),
+        # Per-user RSS growth (or traced heap peak, if higher), checked against the budget
+        'peak_user_mb_max': max(peaks),
+        'peak_rss_mb': peak_rss_mb(),
+        'within_memory_budget': max(peaks) <= PEAK_MB_PER_USER,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return human-readable regressions of results against baseline"""
+    regressions = []
+    for key, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(key)
+        if not base:
+            continue
+        checks = [('latency total p50', current['latency_s']['total']['p50'], base['latency_s']['total']['p50'], True),
+                  ('peak traced MB', current['peak_traced_mb_max'], base['peak_traced_mb_max'], True)]
+        if 'items_fetched' in base:  # older baselines computed items/s from the requested item count
+            checks.append(('items/s', current['items_per_s'], base['items_per_s'], False))
+        for stage in STAGES:
+            if stage in current['latency_s'] and stage in base['latency_s']:
+                checks.append((f'{stage} p50', current['latency_s'][stage]['p50'], base['latency_s'][stage]['p50'], True))
+
+        for name, now, before, lower_is_better in checks:
+            if not before:
+                continue
+            if lower_is_better and now > before * (1 + tolerance):
+                regressions.append(f"{key}: {name} {now:.3f} vs baseline {before:.3f} (+{(now / before - 1) * 100:.0f}%)")
+            elif not lower_is_better and now < before * (1 - tolerance):
+                regressions.append(f"{key}: {name} {now:.3f} vs baseline {before:.3f} ({(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+async def run(args) -> Dict:
+    port = _free_port()
+    server = multiprocessing.Process(target=serve, args=("127.0.0.1", port, args.seed), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        await _wait_until_up(url)
+        # PersonaEngine's OpenAI client picks these up when it is created during warm-up
+        os.environ['OPENAI_API_KEY'] = 'bench'
+        os.environ['OPENAI_BASE_URL'] = f"{url}/v1"
+
+        fetcher = RedditFetcher('bench-id', 'bench-secret', 'PersonaBench/1.0',
+                                base_url=url, auth_url=f"{url}/api/v1/access_token")
+        pipeline = PersonaPipeline(output_dir=args.output_dir, tier=args.tier, fetcher=fetcher,
+                                   backend=args.backend, cascade=args.cascade,
+                                   multitask=args.multitask, topic_prior=args.topic_prior)
+
+        start = time.perf_counter()
+        await pipeline.warm_up()
+        warm_up_s = time.perf_counter() - start
+        # The memory budget applies to a warm worker: run one untimed user so inference
+        # buffers are allocated before the first measured one
+        warmup_user = f"warmup__{max(args.sizes)}"
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{url}/_bench/prepare/{warmup_user}") as response:
+                await response.read()
+        await pipeline.build(warmup_user)
+
+        scenarios = {}
+        for n_items in args.sizes:
+            for n_users in args.users:
+                key = f"{n_items}items_x{n_users}users"
+                print(f"⏱️  {key} ...")
+                scenarios[key] = await run_scenario(pipeline, url, n_items, n_users, args.render)
+                total = scenarios[key]['latency_s']['total']
+                print(f"   p50 {total['p50']:.2f}s  p95 {total['p95']:.2f}s  "
+                      f"{scenarios[key]['items_per_s']:.1f} items/s  peak {scenarios[key]['peak_user_mb_max']:.1f} MB")
+        cascade_report = pipeline.analyzer.cascade.report() if pipeline.analyzer.cascade else None
+        prior_report = pipeline.analyzer.topic_index.report() if pipeline.analyzer.topic_index else None
+        pipeline.close()
+    finally:
+        server.terminate()
+        server.join()
+
+    return {
+        'generated_on': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {'tier': args.tier, 'backend': pipeline.analyzer.backend,
+                   'cascade': bool(cascade_report), 'render': args.render, 'seed': args.seed,
+                   'memory_budget_mb': PEAK_MB_PER_USER},
+        'warm_up_s': warm_up_s,
+        'scenarios': scenarios,
+        'cascade': cascade_report,
+        'topic_prior': prior_report,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reddit Persona Pro pipeline benchmark")
+    parser.add_argument("--sizes", type=_int_list, default=FULL_SIZES, help="Items per user, comma separated")
+    parser.add_argument("--users", type=_int_list, default=FULL_USERS, help="Users per scenario, comma separated")
+    parser.add_argument("--quick", action="store_true", help=f"Shortcut for --sizes {QUICK_SIZES} --users {QUICK_USERS}")
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(SAMPLING_TIERS))
+    parser.add_argument("--backend", default=None, choices=list(BACKENDS), help="NLP inference backend")
+    parser.add_argument("--cascade", action="store_true", default=None, help="Enable the NLPAnalyzer cascade")
+    parser.add_argument("--multitask", action="store_true", default=None, help="Use the shared-encoder analyzer")
+    parser.add_argument("--topic-prior", action="store_true", default=None, help="Enable the subreddit topic prior")
+    parser.add_argument("--render", action="store_true", help="Also render the PDF for every user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--output-dir", default=os.path.join(BENCH_DIR, "output"), help="PDF directory when --render is set")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.users = QUICK_SIZES, QUICK_USERS
+
+    results = asyncio.run(run(args))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Results saved to '{args.output}'")
+
+    failed = False
+    over_budget = [key for key, s in results['scenarios'].items() if not s['within_memory_budget']]
+    if over_budget:
+        failed = True
+        print(f"❌ Per-user memory budget ({PEAK_MB_PER_USER} MB) exceeded in: {', '.join(over_budget)}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline updated: '{args.baseline}'")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            failed = True
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+        else:
+            print("✅ No regressions against baseline")
+    else:
+        print("ℹ️ No baseline found; run with --update-baseline to store one")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# reddit-persona-pro/benchmarks/scale_workers.py
+"""
+Distributed-mode scaling benchmark: throughput against the number of worker processes.
+
+    python -m benchmarks.scale_workers --workers 1,2,4 --users 40 --items 200
+
+Every worker count drains a fresh SQLite queue holding the same synthetic
+users, served by the local Reddit/OpenAI stand-ins. Workers load their
+models first and start claiming together, so the measured window runs from
+the first claim to the last completion and excludes model loading.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.run_benchmark import BENCH_DIR, _free_port, _int_list, _wait_until_up
+from benchmarks.stub_servers import serve
+from persona.distributed import Worker
+from persona.inference_backends import BACKENDS
+from persona.job_queue import DONE, SQLiteJobQueue, open_queue
+from persona.pipeline import DEFAULT_TIER
+from persona.reddit_fetcher import RedditFetcher
+from persona.sampler import SAMPLING_TIERS
+
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "scaling_results.json")
+
+
+def _bench_worker(queue_url: str, url: str, options: Dict, start_together):
+    """One worker process: warm up, wait for the others, then drain the queue"""
+    from persona.pipeline import PersonaPipeline
+
+    queue = open_queue(queue_url)
+    fetcher = RedditFetcher('bench-id', 'bench-secret', 'PersonaBench/1.0',
+                            base_url=url, auth_url=f"{url}/api/v1/access_token")
+    pipeline = PersonaPipeline(output_dir=options['output_dir'], tier=options['tier'], fetcher=fetcher,
+                               backend=options['backend'], cascade=options['cascade'],
+                               multitask=options['multitask'], topic_prior=options['topic_prior'],
+                               similarity_index=False)
+    worker = Worker(queue, pipeline, poll_interval=0.05, exit_when_empty=True, render_pdf=False)
+
+    async def _run():
+        await pipeline.warm_up()
+        await asyncio.get_running_loop().run_in_executor(None, start_together.wait)
+        await worker.run()
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pipeline.close()
+        queue.close()
+
+
+def run_workers(url: str, n_workers: int, usernames: List[str], options: Dict) -> Dict:
+    """Drain one queue of `usernames` with `n_workers` processes; returns its throughput"""
+    path = os.path.join(options['output_dir'], f"queue_{n_workers}w.db")
+    if os.path.exists(path):
+        os.remove(path)
+    queue = SQLiteJobQueue(path)
+    queue.enqueue(usernames, f"scale_{n_workers}")
+
+    ctx = multiprocessing.get_context("spawn")
+    start_together = ctx.Barrier(n_workers)
+    procs = [ctx.Process(target=_bench_worker, args=(f"sqlite:///{path}", url, options, start_together))
+             for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    row = queue.conn.execute(
+        "SELECT MIN(started_at) AS first, MAX(finished_at) AS last, COUNT(*) AS n FROM jobs WHERE status = ?",
+        (DONE,)).fetchone()
+    items = 0
+    for (result,) in queue.conn.execute("SELECT result FROM jobs WHERE status = ?", (DONE,)):
+        persona_json = json.loads(result).get('persona')
+        if persona_json:
+            with open(persona_json, encoding='utf-8') as f:
+                items += (json.load(f).get('activity') or {}).get('total', 0)
+    stats = queue.stats()
+    queue.close()
+
+    elapsed = (row['last'] - row['first']) if row['n'] else 0.0
+    return {
+        'workers': n_workers,
+        'users_done': row['n'],
+        'users_failed': stats['counts']['failed'],
+        # Items actually fetched and analyzed, from each user's activity totals
+        'items': items,
+        'elapsed_s': elapsed,
+        'users_per_s': row['n'] / elapsed if elapsed else 0.0,
+        'items_per_s': items / elapsed if elapsed else 0.0,
+    }
+
+
+def run(args) -> Dict:
+    port = _free_port()
+    usernames = [f"scale{u}__{args.items}" for u in range(args.users)]
+    # Keep every synthetic user cached so listing generation is not timed as fetch latency
+    server = multiprocessing.Process(target=serve, args=("127.0.0.1", port, args.seed, len(usernames)), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port}"
+
+    async def _prepare():
+        await _wait_until_up(url)
+        async with aiohttp.ClientSession() as session:
+            for username in usernames:
+                async with session.post(f"{url}/_bench/prepare/{username}") as response:
+                    await response.read()
+
+    results = []
+    try:
+        asyncio.run(_prepare())
+        # Worker processes inherit these; PersonaEngine's OpenAI client reads them during warm-up
+        os.environ['OPENAI_API_KEY'] = 'bench'
+        os.environ['OPENAI_BASE_URL'] = f"{url}/v1"
+        with tempfile.TemporaryDirectory(dir=BENCH_DIR) as output_dir:
+            options = {'output_dir': output_dir, 'tier': args.tier, 'backend': args.backend,
+                       'cascade': args.cascade, 'multitask': args.multitask, 'topic_prior': args.topic_prior}
+            for n_workers in args.workers:
+                print(f"⏱️  {n_workers} worker(s), {len(usernames)} users x {args.items} items ...")
+                start = time.perf_counter()
+                result = run_workers(url, n_workers, usernames, options)
+                result['wall_s'] = time.perf_counter() - start
+                base = results[0] if results else result
+                result['speedup'] = result['users_per_s'] / base['users_per_s'] if base['users_per_s'] else 0.0
+                result['efficiency'] = result['speedup'] * base['workers'] / n_workers
+                results.append(result)
+                print(f"   {result['users_per_s']:.2f} users/s  {result['items_per_s']:.1f} items/s  "
+                      f"speedup x{result['speedup']:.2f} ({result['efficiency']:.0%} per worker)")
+    finally:
+        server.terminate()
+        server.join()
+
+    return {
+        'generated_on': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {'users': args.users, 'items_per_user': args.items, 'tier': args.tier, 'backend': args.backend,
+                   'cascade': bool(args.cascade), 'multitask': bool(args.multitask), 'seed': args.seed},
+        'runs': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed-mode throughput against worker count")
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="Worker counts, comma separated")
+    parser.add_argument("--users", type=int, default=40, help="Users drained per worker count")
+    parser.add_argument("--items", type=int, default=200, help="Items per user")
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(SAMPLING_TIERS))
+    parser.add_argument("--backend", default=None, choices=list(BACKENDS), help="NLP inference backend")
+    parser.add_argument("--cascade", action="store_true", default=None, help="Enable the NLPAnalyzer cascade")
+    parser.add_argument("--multitask", action="store_true", default=None, help="Use the shared-encoder analyzer")
+    parser.add_argument("--topic-prior", action="store_true", default=None, help="Enable the subreddit topic prior")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Results saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# reddit-persona-pro/benchmarks/stub_servers.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+from benchmarks.synthetic_corpus import generate_user, listing_page
+
+
+class StubServer:
+    """
+    Local stand-in for www.reddit.com (token), oauth.reddit.com (listings)
+    and the OpenAI chat completions endpoint, served from one aiohttp app.
+
+    Usernames look like `<name>__<n_items>` so the client controls each
+    synthetic user's size. Listings are generated on demand and only the most
+    recent users are cached; call `/_bench/prepare/<username>` before timing a
+    user so generation cost is not counted as fetch latency.
+    """
+
+    CACHED_USERS = 4
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = 0, cached_users: int = CACHED_USERS):
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.cached_users = cached_users
+        self.url = None
+        self.request_counts: Dict[str, int] = {}
+        self._users: "OrderedDict[str, Tuple[list, list]]" = OrderedDict()
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post('/api/v1/access_token', self.access_token)
+        self.app.router.add_get('/user/{username}/submitted', self.submitted)
+        self.app.router.add_get('/user/{username}/comments', self.comments)
+        self.app.router.add_get('/user/{username}/about', self.about)
+        self.app.router.add_post('/v1/chat/completions', self.chat_completions)
+        self.app.router.add_post('/_bench/prepare/{username}', self.prepare)
+
+    def _count(self, route: str):
+        self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def _user(self, username: str):
+        if username in self._users:
+            self._users.move_to_end(username)
+        else:
+            n_items = int(username.rsplit('__', 1)[1]) if '__' in username else 100
+            self._users[username] = generate_user(username, n_items, self.seed)
+            while len(self._users) > self.cached_users:
+                self._users.popitem(last=False)
+        return self._users[username]
+
+    async def prepare(self, request: web.Request) -> web.Response:
+        posts, comments = self._user(request.match_info['username'])
+        return web.json_response({'posts': len(posts), 'comments': len(comments)})
+
+    async def access_token(self, request: web.Request) -> web.Response:
+        self._count('token')
+        return web.json_response({'access_token': 'bench-token', 'token_type': 'bearer', 'expires_in': 3600})
+
+    async def submitted(self, request: web.Request) -> web.Response:
+        self._count('listing')
+        posts, _ = self._user(request.match_info['username'])
+        return web.json_response(listing_page(posts, request.query.get('after'), int(request.query.get('limit', 100))))
+
+    async def comments(self, request: web.Request) -> web.Response:
+        self._count('listing')
+        _, comments = self._user(request.match_info['username'])
+        return web.json_response(listing_page(comments, request.query.get('after'), int(request.query.get('limit', 100))))
+
+    async def about(self, request: web.Request) -> web.Response:
+        self._count('about')
+        return web.json_response({'kind': 't2', 'data': {'name': request.match_info['username'], 'icon_img': ''}})
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        self._count('openai')
+        body = await request.json()
+        return web.json_response({
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-3.5-turbo'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': 'A synthetic benchmark user with varied interests.'},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def serve(host: str, port: int, seed: int = 0, cached_users: int = StubServer.CACHED_USERS):
+    """Run the stub server until the process is terminated (multiprocessing target)"""
+    async def _main():
+        server = StubServer(host, port, seed, cached_users)
+        await server.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(_main())
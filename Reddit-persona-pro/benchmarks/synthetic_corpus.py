@@ -0,0 +1,126 @@
+# reddit-persona-pro/benchmarks/synthetic_corpus.py
+
+import random
+from typing import Dict, List, Tuple
+
+# Subreddit -> vocabulary used to make topic/NER output non-trivial
+SUBREDDITS = {
+    "technology": ["python", "GPU", "Linux", "API", "compiler", "laptop", "cloud", "Rust"],
+    "gaming": ["Steam", "Elden Ring", "controller", "speedrun", "patch", "FPS", "Nintendo"],
+    "soccer": ["Arsenal", "Madrid", "goal", "transfer", "striker", "Premier League"],
+    "politics": ["election", "senate", "policy", "Washington", "vote", "campaign"],
+    "science": ["CERN", "protein", "telescope", "quantum", "study", "NASA"],
+    "Cooking": ["garlic", "sourdough", "recipe", "oven", "Tokyo", "ramen"],
+    "travel": ["Lisbon", "hostel", "flight", "Japan", "itinerary", "visa"],
+    "personalfinance": ["401k", "budget", "mortgage", "index fund", "taxes"],
+    "AskReddit": ["honestly", "weird", "story", "friend", "childhood", "job"],
+}
+
+FILLER = (
+    "I think that this is really the best way to look at it and honestly most people "
+    "would agree if they tried it for a while instead of arguing about it online"
+).split()
+
+PHRASES = ["lol", "this.", "Same here!", "Thanks, that helped.", "Why though?", "Agreed."]
+
+# Rough count of the extra keys a real listing child carries; their content is irrelevant
+NOISE_FIELDS = 80
+
+START_UTC = 1_577_836_800  # 2020-01-01
+
+
+def _noise(rng: random.Random) -> Dict:
+    return {f"field_{k}": rng.choice(["", None, False, 0, "t2_abc123", "https://i.redd.it/x.png"])
+            for k in range(NOISE_FIELDS)}
+
+
+def _sentence(rng: random.Random, vocab: List[str], words: int) -> str:
+    out = []
+    for _ in range(words):
+        out.append(rng.choice(vocab) if rng.random() < 0.2 else rng.choice(FILLER))
+    text = ' '.join(out)
+    return text[0].upper() + text[1:] + rng.choice(['.', '!', '?', '.'])
+
+
+def _text(rng: random.Random, vocab: List[str]) -> str:
+    if rng.random() < 0.25:
+        return rng.choice(PHRASES)
+    # Log-normal sentence counts: mostly short, occasionally very long
+    sentences = max(1, int(rng.lognormvariate(1.0, 1.0)))
+    return ' '.join(_sentence(rng, vocab, rng.randint(6, 24)) for _ in range(sentences))
+
+
+def generate_user(username: str, n_items: int, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Build a synthetic user's submitted and comment listings (child `data` dicts).
+
+    Roughly a third of the items are posts. Each user favours a few subreddits,
+    scores are heavy-tailed and timestamps span ~2 years with bursts.
+    """
+    rng = random.Random(f"{username}:{n_items}:{seed}")
+    favourites = rng.sample(list(SUBREDDITS), k=min(len(SUBREDDITS), rng.randint(2, 5)))
+    weights = [rng.random() ** 2 + 0.05 for _ in favourites]
+
+    n_posts = max(1, n_items // 3) if n_items > 1 else 0
+    n_comments = n_items - n_posts
+    now = START_UTC + 2 * 365 * 86400
+
+    def created() -> float:
+        # Bursty activity: cluster items around a few random sessions
+        session = START_UTC + rng.random() * (now - START_UTC)
+        return float(int(session + rng.gauss(0, 3600)))
+
+    posts = []
+    for i in range(n_posts):
+        subreddit = rng.choices(favourites, weights)[0]
+        vocab = SUBREDDITS[subreddit]
+        item = _noise(rng)
+        item.update({
+            'id': f"p{i}",
+            'name': f"t3_p{i}",
+            'title': _sentence(rng, vocab, rng.randint(4, 12)),
+            # ~30% link posts without selftext, which the preprocessor skips
+            'selftext': _text(rng, vocab) if rng.random() > 0.3 else '',
+            'subreddit': subreddit,
+            'created_utc': created(),
+            'score': int(rng.paretovariate(1.2)),
+            'num_comments': rng.randint(0, 500),
+            'author': username,
+        })
+        posts.append(item)
+
+    comments = []
+    for i in range(n_comments):
+        subreddit = rng.choices(favourites, weights)[0]
+        item = _noise(rng)
+        item.update({
+            'id': f"c{i}",
+            'name': f"t1_c{i}",
+            'body': _text(rng, SUBREDDITS[subreddit]),
+            'subreddit': subreddit,
+            'created_utc': created(),
+            'score': int(rng.paretovariate(1.5)),
+            'link_id': f"t3_x{i}",
+            'author': username,
+        })
+        comments.append(item)
+
+    posts.sort(key=lambda p: p['created_utc'], reverse=True)
+    comments.sort(key=lambda c: c['created_utc'], reverse=True)
+    return posts, comments
+
+
+def listing_page(items: List[Dict], after: str, limit: int = 100) -> Dict:
+    """Paginate items the way Reddit's listing endpoints do"""
+    start = int(after) if after else 0
+    page = items[start:start + limit]
+    next_after = str(start + limit) if start + limit < len(items) else None
+    kind = 't1' if page and 'body' in page[0] else 't3'
+    return {
+        'kind': 'Listing',
+        'data': {
+            'after': next_after,
+            'dist': len(page),
+            'children': [{'kind': kind, 'data': item} for item in page],
+        }
+    }
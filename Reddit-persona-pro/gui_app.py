@@ -1,15 +1,15 @@
 import logging
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import asyncio
+import queue
 import threading
 import os
+import subprocess
+import sys
+from collections import deque
 from dotenv import load_dotenv
-from persona.reddit_fetcher import RedditFetcher
-from persona.content_preprocessor import ContentPreprocessor
-from persona.nlp_analyzer import NLPAnalyzer
-from persona.persona_engine import PersonaEngine
-from persona.visual_renderer import PersonaVisualizer
+from persona.pipeline import PersonaPipeline, STAGES
 
 # Logging configuration
 os.makedirs("logs", exist_ok=True)
@@ -21,77 +21,165 @@ logging.basicConfig(
 
 load_dotenv()
 
-MAX_CHUNKS = 300
-MAX_ITEMS = 100
+STAGE_LABELS = {
+    "warmup": "🔥 Loading NLP models (first run only)...",
+    "fetch": "🔍 Fetching Reddit data...",
+    "activity": "📈 Analyzing posting activity...",
+    "preprocess": "🧹 Cleaning and chunking content...",
+    "analyze": "🧠 Running NLP analysis...",
+    "persona": "🧬 Generating structured persona...",
+    "render": "📄 Rendering PDF...",
+    "cancelling": "🛑 Cancelling — waiting for the current step to finish...",
+}
 
-async def generate_persona(username: str):
+
+def open_output_dir(path: str = "output"):
+    """Open the output folder with the platform's file manager"""
     try:
-        logging.info(f"Fetching Reddit data for user: {username}")
-        fetcher = RedditFetcher(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT')
-        )
-        posts, comments = await fetcher.fetch_user_content(username)
-
-        if not posts and not comments:
-            logging.warning(f"No content found for user: {username}")
-            return False, "⚠️ No public posts or comments found for this user."
-
-        preprocessor = ContentPreprocessor()
-        cleaned_posts, cleaned_comments = preprocessor.clean_and_chunk(posts, comments, max_items=MAX_ITEMS)
-
-        analyzer = NLPAnalyzer()
-        all_chunks = [chunk for p in cleaned_posts for chunk in p['chunks']] + \
-                     [chunk for c in cleaned_comments for chunk in c['chunks']]
-        all_chunks = all_chunks[:MAX_CHUNKS]
-
-        sentiments = analyzer.analyze_sentiments_batch(all_chunks)
-        topics_nested = analyzer.extract_topics_batch(all_chunks)
-        entities_nested = [analyzer.extract_entities(text) for text in all_chunks]
-
-        metadata = {
-            'entities': sum(entities_nested, []),
-            'sentiments': sentiments,
-            'topics': sum(topics_nested, []),
-            'posts': cleaned_posts,
-            'comments': cleaned_comments,
-            'texts': all_chunks
-        }
-
-        logging.info(f"Generating persona for user: {username}")
-        engine = PersonaEngine()
-        persona = engine.generate_persona(metadata)
-        cited = engine.add_citations(persona, cleaned_posts + cleaned_comments)
-        summary = engine.generate_natural_summary(persona)
-
-        avatar_url = await fetcher.fetch_user_avatar(username)
-        image_url = avatar_url or "https://www.redditstatic.com/avatars/defaults/v2/avatar_default_5.png"
-
-        visualizer = PersonaVisualizer()
-        visualizer.render_to_pdf(
-            persona=cited,
-            summary=summary,
-            image_url=image_url,
-            output_filename=f"{username}_persona.pdf"
-        )
+        if sys.platform.startswith("win"):
+            os.startfile(path)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", path])
+        else:
+            subprocess.Popen(["xdg-open", path])
+    except Exception as start_err:
+        logging.warning(f"Failed to open output directory: {start_err}")
+
+
+class PersonaWorker:
+    """
+    Runs persona jobs on a single persistent background event loop.
+
+    The pipeline (and its models) lives as long as the worker, jobs are
+    processed one at a time from a FIFO queue, and the running job can be
+    cancelled. The Tk thread never waits on the loop: its requests are
+    scheduled with call_soon_threadsafe, and the worker reports back through
+    the `events` queue, which the GUI drains on its own thread. Events are
+    ("progress", username, stage, step, total), ("done", username, success,
+    message), ("queue", current, pending) and ("fatal", message).
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.pending = deque()
+        self.current = None
+        self.pipeline = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="persona-loop", daemon=True)
+        self.thread.start()
+
+    def _emit(self, *event):
+        self.events.put(event)
 
+    def _progress(self, username, stage, step, total):
+        self._emit("progress", username, stage, step, total)
+
+    def _queue_changed(self):
+        self._emit("queue", self.current, list(self.pending))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.pipeline = PersonaPipeline()
+        except Exception as e:
+            logging.error(f"Could not create the persona pipeline: {e}")
+            self._emit("fatal", f"❌ Could not start the persona pipeline: {e}")
+            return
+        self.loop.create_task(self._consume())
+        self.loop.run_forever()
+
+    async def _consume(self):
+        self._progress(None, "warmup", 0, len(STAGES))
         try:
-            os.startfile("output")  # Windows only
-        except Exception as start_err:
-            logging.warning(f"Failed to open output directory: {start_err}")
+            await self.pipeline.warm_up()
+            logging.info("NLP models loaded")
+        except Exception as e:
+            logging.error(f"Model warm-up failed: {e}")
+        self._progress(None, "idle", 0, len(STAGES))
+
+        while True:
+            while not self.pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            username = self.pending.popleft()
+            self.current = username
+            self._queue_changed()
+            self._task = asyncio.ensure_future(self.pipeline.run(username, progress=self._progress))
+            try:
+                pdf_path = await self._task
+                if pdf_path is None:
+                    logging.warning(f"No content found for user: {username}")
+                    self._emit("done", username, False, "⚠️ No public posts or comments found for this user.")
+                else:
+                    logging.info(f"Persona successfully saved to {pdf_path}")
+                    self._emit("done", username, True, f"✅ Persona saved to {pdf_path}")
+            except asyncio.CancelledError:
+                logging.info(f"Cancelled persona generation for user: {username}")
+                self._emit("done", username, False, f"🛑 Cancelled u/{username}")
+            except Exception as e:
+                logging.error(f"Exception during persona generation: {e}")
+                self._emit("done", username, False, f"❌ Error for u/{username}: {e}")
+            finally:
+                self._task = None
+                self.current = None
+                self._queue_changed()
+
+    def submit(self, username: str):
+        """Queue a username (returns immediately; duplicates are dropped on the loop)"""
+        def _enqueue():
+            if username != self.current and username not in self.pending:
+                self.pending.append(username)
+                self._wakeup.set()
+            self._queue_changed()
+
+        self.loop.call_soon_threadsafe(_enqueue)
+
+    def cancel_current(self):
+        """
+        Cancel the running job (returns immediately).
+
+        A blocking stage in flight stops at its next checkpoint; until it does,
+        the GUI shows "cancelling" and the job still counts as running.
+        """
+        def _cancel():
+            if self._task and not self._task.done():
+                self.pipeline.cancel()
+                self._task.cancel()
+                self._progress(self.current, "cancelling", 0, len(STAGES))
+
+        self.loop.call_soon_threadsafe(_cancel)
+
+    def clear_queue(self):
+        def _clear():
+            self.pending.clear()
+            self._queue_changed()
+
+        self.loop.call_soon_threadsafe(_clear)
+
 
-        logging.info(f"Persona successfully saved to output/{username}_persona.pdf")
-        return True, f"✅ Persona saved to output/{username}_persona.pdf"
+def parse_usernames(raw: str):
+    """Accept one or more profile URLs / usernames separated by commas or whitespace"""
+    usernames = []
+    for token in raw.replace(',', ' ').split():
+        token = token.strip().rstrip('/')
+        if "/user/" in token or "/u/" in token:
+            token = token.split('/')[-1]
+        elif token.startswith("u/"):
+            token = token[2:]
+        elif "/" in token:
+            continue
+        if token and token not in usernames:
+            usernames.append(token)
+    return usernames
 
-    except Exception as e:
-        logging.error(f"Exception during persona generation: {e}")
-        return False, f"❌ Error: {str(e)}"
 
 def start_gui():
     root = tk.Tk()
     root.title("Reddit Persona Pro — AI Insight Generator")
-    root.geometry("620x360")
+    root.geometry("620x520")
     root.configure(bg="#f8fafc")
 
     banner = tk.Label(root, text="🔍 Reddit Persona Generator", font=("Inter", 20, "bold"), bg="#f8fafc", fg="#1e40af")
@@ -100,40 +188,126 @@ def start_gui():
     frame = tk.Frame(root, bg="#f1f5f9", padx=20, pady=15, bd=1, relief=tk.RIDGE)
     frame.pack(pady=10)
 
-    tk.Label(frame, text="Paste Reddit Profile URL:", font=("Inter", 12), bg="#f1f5f9").pack(anchor="w")
+    tk.Label(frame, text="Paste Reddit Profile URL(s):", font=("Inter", 12), bg="#f1f5f9").pack(anchor="w")
     url_entry = tk.Entry(frame, width=60, font=("Inter", 11))
     url_entry.pack(pady=6)
 
+    progress_bar = ttk.Progressbar(root, length=560, maximum=len(STAGES), mode="determinate")
+    progress_bar.pack(pady=4)
+
+    stage_label = tk.Label(root, text="", fg="#334155", font=("Inter", 10), bg="#f8fafc")
+    stage_label.pack()
+
     status_label = tk.Label(root, text="", fg="green", wraplength=580, justify="left", font=("Inter", 10), bg="#f8fafc")
-    status_label.pack(pady=10)
+    status_label.pack(pady=6)
 
-    def on_submit():
-        url = url_entry.get().strip()
-        if not url or "/user/" not in url:
-            messagebox.showwarning("Input Error", "Please enter a valid Reddit user profile URL (e.g. /user/username).")
-            return
+    queue_list = tk.Listbox(root, height=4, width=60, font=("Inter", 10))
+    queue_list.pack(pady=4)
+
+    # The Tk-side view of the worker queue, kept current by "queue" events
+    snapshot = {'current': None, 'pending': []}
 
-        username = url.rstrip('/').split('/')[-1]
-        status_label.config(text="⏳ Generating persona, please wait...", fg="orange")
+    def on_progress(username, stage, step, total):
+        if stage == "idle":
+            stage_label.config(text="Ready — models loaded")
+            progress_bar.config(mode="determinate", value=0)
+            progress_bar.stop()
+        elif stage == "warmup":
+            stage_label.config(text=STAGE_LABELS[stage])
+            progress_bar.config(mode="indeterminate")
+            progress_bar.start(12)
+        elif stage == "cancelling":
+            stage_label.config(text=f"u/{username} — {STAGE_LABELS[stage]}")
+            cancel_btn.config(state=tk.DISABLED)
+        else:
+            stage_label.config(text=f"u/{username} — {STAGE_LABELS[stage]} ({step}/{total})")
+            progress_bar.config(value=step - 1)
 
-        def worker():
+    def on_done(username, success, message):
+        progress_bar.config(value=len(STAGES) if success else 0)
+        status_label.config(text=message, fg="green" if success else "red")
+
+    def on_queue_change(current, pending):
+        snapshot['current'], snapshot['pending'] = current, list(pending)
+        queue_list.delete(0, tk.END)
+        if current:
+            queue_list.insert(tk.END, f"▶ u/{current}")
+        for name in pending:
+            queue_list.insert(tk.END, f"⏳ u/{name}")
+        cancel_btn.config(state=tk.NORMAL if current else tk.DISABLED)
+
+    def on_fatal(message):
+        progress_bar.stop()
+        progress_bar.config(mode="determinate", value=0)
+        stage_label.config(text="")
+        status_label.config(text=message, fg="red")
+        for button in (submit_btn, cancel_btn, clear_btn):
+            button.config(state=tk.DISABLED)
+
+    handlers = {"progress": on_progress, "done": on_done, "queue": on_queue_change, "fatal": on_fatal}
+    worker = PersonaWorker()
+
+    # Worker events arrive from the loop thread; drain them here so Tk is only touched from its own thread
+    def poll_events():
+        while True:
             try:
-                result = asyncio.run(generate_persona(username))
-                success, message = result
-            except Exception as e:
-                success, message = False, f"❌ Unexpected error: {e}"
-                logging.error(f"Unexpected GUI thread error: {e}")
+                kind, *args = worker.events.get_nowait()
+            except queue.Empty:
+                break
+            handlers[kind](*args)
+        root.after(50, poll_events)
 
-            # Update UI from the main thread
-            root.after(0, lambda: status_label.config(text=message, fg="green" if success else "red"))
+    def on_submit():
+        raw = url_entry.get().strip()
+        usernames = parse_usernames(raw)
+        if not usernames:
+            messagebox.showwarning("Input Error", "Please enter a valid Reddit user profile URL (e.g. /user/username).")
+            return
 
-        threading.Thread(target=worker, daemon=True).start()
+        queued, skipped = [], []
+        for name in usernames:
+            if name == snapshot['current'] or name in snapshot['pending']:
+                skipped.append(name)
+                continue
+            worker.submit(name)
+            # Optimistic until the worker's next "queue" event replaces the snapshot
+            snapshot['pending'].append(name)
+            queued.append(name)
+        url_entry.delete(0, tk.END)
+        if skipped:
+            status_label.config(text=f"ℹ️ Already queued: {', '.join(skipped)}", fg="orange")
+        else:
+            status_label.config(text=f"⏳ Queued {len(queued)} user(s)", fg="orange")
+
+    buttons = tk.Frame(root, bg="#f8fafc")
+    buttons.pack(pady=10)
 
     submit_btn = tk.Button(
-        root, text="✨ Generate Persona", command=on_submit,
+        buttons, text="✨ Generate Persona", command=on_submit,
         bg="#2563eb", fg="white", font=("Inter", 12, "bold"), padx=16, pady=8, relief=tk.FLAT, cursor="hand2"
     )
-    submit_btn.pack(pady=10)
+    submit_btn.pack(side="left", padx=4)
+
+    cancel_btn = tk.Button(
+        buttons, text="🛑 Cancel", command=worker.cancel_current, state=tk.DISABLED,
+        bg="#dc2626", fg="white", font=("Inter", 12, "bold"), padx=16, pady=8, relief=tk.FLAT, cursor="hand2"
+    )
+    cancel_btn.pack(side="left", padx=4)
+
+    clear_btn = tk.Button(
+        buttons, text="Clear Queue", command=worker.clear_queue,
+        font=("Inter", 11), padx=10, pady=8, relief=tk.FLAT, cursor="hand2"
+    )
+    clear_btn.pack(side="left", padx=4)
+
+    open_btn = tk.Button(
+        buttons, text="📂 Open Output", command=lambda: open_output_dir("output"),
+        font=("Inter", 11), padx=10, pady=8, relief=tk.FLAT, cursor="hand2"
+    )
+    open_btn.pack(side="left", padx=4)
+
+    url_entry.bind("<Return>", lambda _event: on_submit())
+    poll_events()
 
     footer = tk.Label(root, text="Made with ❤️ using GPT-4, HuggingFace & Reddit API",
                       font=("Inter", 9), fg="#64748b", bg="#f8fafc")
@@ -2,16 +2,22 @@
 
 import argparse
 import asyncio
-import os
 from dotenv import load_dotenv
-from persona.reddit_fetcher import RedditFetcher
-from persona.content_preprocessor import ContentPreprocessor
-from persona.nlp_analyzer import NLPAnalyzer
-from persona.persona_engine import PersonaEngine
 from persona.output_writer import OutputWriter
+from persona.pipeline import PersonaPipeline, DEFAULT_TIER
+from persona.sampler import SAMPLING_TIERS
+from persona.inference_backends import BACKENDS
 
-MAX_CHUNKS = 300  # Limit total chunks to reduce processing time
-MAX_ITEMS = 100   # Limit number of posts/comments to process
+STAGE_MESSAGES = {
+    "fetch": "🔍 Fetching Reddit data for user: u/{}",
+    "analyze": "🧠 Running NLP analysis...",
+    "persona": "🧬 Generating structured persona...",
+}
+
+
+def print_progress(username, stage, step, total):
+    if stage in STAGE_MESSAGES:
+        print(STAGE_MESSAGES[stage].format(username))
 
 async def main():
     load_dotenv()
@@ -19,6 +25,17 @@ async def main():
     parser = argparse.ArgumentParser(description="Reddit User Persona Generator")
     parser.add_argument("--url", required=True, help="Reddit user profile URL (e.g. https://www.reddit.com/user/spez)")
     parser.add_argument("--output", default="sample_user_persona.md", help="Output markdown file name")
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(SAMPLING_TIERS), help="Inference budget tier")
+    parser.add_argument("--backend", default=None, choices=list(BACKENDS),
+                        help="NLP inference backend (default: PERSONA_NLP_BACKEND or pytorch)")
+    parser.add_argument("--cascade", action="store_true", default=None,
+                        help="Decide easy chunks with cheap classifiers, escalating only uncertain ones")
+    parser.add_argument("--multitask", action="store_true", default=None,
+                        help="Use the shared-encoder analyzer (one forward pass per chunk)")
+    parser.add_argument("--topic-prior", action="store_true", default=None,
+                        help="Reuse known subreddit topic distributions instead of classifying every chunk")
+    parser.add_argument("--index", action="store_true", default=None,
+                        help="Store the persona in the similarity index and list the most similar known users")
     args = parser.parse_args()
 
     if "/user/" not in args.url:
@@ -28,45 +45,30 @@ async def main():
     username = args.url.strip('/').split('/')[-1]
 
     try:
-        print(f"🔍 Fetching Reddit data for user: u/{username}")
-        fetcher = RedditFetcher(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaBot/1.0')
-        )
-
-        posts, comments = await fetcher.fetch_user_content(username)
-        if not posts and not comments:
+        pipeline = PersonaPipeline(tier=args.tier, backend=args.backend, cascade=args.cascade,
+                                   multitask=args.multitask, topic_prior=args.topic_prior,
+                                   similarity_index=args.index)
+        built = await pipeline.build(username, progress=print_progress)
+        if built is None:
             print("⚠️ No public posts or comments found for this user.")
             return
-
-        preprocessor = ContentPreprocessor()
-        cleaned_posts, cleaned_comments = preprocessor.clean_and_chunk(posts, comments, max_items=MAX_ITEMS)
-
-        print("🧠 Running NLP analysis...")
-        analyzer = NLPAnalyzer()
-        all_chunks = [chunk for p in cleaned_posts for chunk in p['chunks']] + \
-                     [chunk for c in cleaned_comments for chunk in c['chunks']]
-        all_chunks = all_chunks[:MAX_CHUNKS]
-
-        sentiments = analyzer.analyze_sentiments_batch(all_chunks)
-        topics_nested = analyzer.extract_topics_batch(all_chunks)
-        entities_nested = [analyzer.extract_entities(text) for text in all_chunks]
-
-        metadata = {
-            'entities': sum(entities_nested, []),
-            'sentiments': sentiments,
-            'topics': sum(topics_nested, []),
-            'posts': cleaned_posts,
-            'comments': cleaned_comments,
-            'texts': all_chunks
-        }
-
-        print("🧬 Generating structured persona...")
-        engine = PersonaEngine()
-        structured = engine.generate_persona(metadata)
-        cited = engine.add_citations(structured, cleaned_posts + cleaned_comments)
-        summary = engine.generate_natural_summary(structured)
+        cited, summary = built
+
+        activity = pipeline.last_activity
+        if activity and activity.get('total'):
+            print(f"   activity: {activity['total']} items over {activity['span_days']:.0f} days "
+                  f"({activity['items_per_day']:.1f}/day, burstiness {activity['burstiness']:+.2f})")
+        if pipeline.analyzer.topic_index:
+            prior = pipeline.analyzer.topic_index.report()
+            print(f"   topic prior: {prior['skip_rate']:.0%} of chunks skipped classification "
+                  f"({prior['confident_subreddits']} confident subreddits)")
+        if pipeline.analyzer.cascade:
+            for task, stats in pipeline.analyzer.cascade.report().items():
+                print(f"   cascade {task}: {stats['escalation_rate']:.0%} escalated to transformers")
+        if pipeline.index is not None:
+            similar = pipeline.index.similar_to(username, k=5)
+            if similar:
+                print("👥 Similar users: " + ", ".join(f"u/{name} ({score:.2f})" for name, score in similar))
 
         print("💾 Saving output...")
         writer = OutputWriter()
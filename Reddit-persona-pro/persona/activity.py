@@ -0,0 +1,175 @@
+# reddit-persona-pro/persona/activity.py
+"""
+Temporal activity analytics over the complete fetched listings.
+
+Works on the raw compact listing items (created_utc, subreddit, score), not
+on the cleaned content items, so link posts and items dropped by
+preprocessing are still counted. No NLP is involved, so this can run on
+every fetch, including users that never go through inference:
+
+    python -m persona.activity spez
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# The Unix epoch was a Thursday; shifting by three days puts Monday 00:00 UTC at hour-of-week 0
+_EPOCH_HOUR_OFFSET = 3 * 24
+
+# Per-listing item cap of RedditFetcher; a listing this long is truncated history
+LISTING_CAP = 1000
+# Shortest span rates are computed over, so a handful of items posted on one day is not "10 a day"
+MIN_SPAN_DAYS = 7.0
+RECENT_DAYS = 30
+
+
+def _empty() -> Dict:
+    return {'total': 0, 'posts': 0, 'comments': 0}
+
+
+def analyze_activity(posts: List[Dict], comments: List[Dict], now: Optional[float] = None,
+                     top_subreddits: int = 10) -> Dict:
+    """
+    Posting-rate series, hour-of-week heatmap, burstiness and per-subreddit activity.
+
+    Args:
+        posts: Raw listing items from RedditFetcher (submitted).
+        comments: Raw listing items from RedditFetcher (comments).
+        now: Reference time for the recent rate (default: current time).
+        top_subreddits: Subreddits listed in `subreddits`.
+
+    Returns:
+        A JSON-serializable dict. Times are UTC.
+    """
+    items = posts + comments
+    n = len(items)
+    if not n:
+        return _empty()
+
+    # Columnar copies of the listing fields, built once
+    ts = np.fromiter((item.get('created_utc') or 0.0 for item in items), dtype=np.float64, count=n)
+    score = np.fromiter((item.get('score') or 0 for item in items), dtype=np.float64, count=n)
+    is_comment = np.zeros(n, dtype=bool)
+    is_comment[len(posts):] = True
+    subreddit = np.array([item.get('subreddit') or '' for item in items], dtype=str)
+
+    valid = ts > 0
+    if not valid.any():
+        return _empty()
+    order = np.argsort(ts[valid], kind='stable')
+    ts, score, is_comment, subreddit = (a[valid][order] for a in (ts, score, is_comment, subreddit))
+    n = len(ts)
+    now = now or time.time()
+
+    first, last = ts[0], ts[-1]
+    span_days = (last - first) / DAY
+    rate_days = max(span_days, MIN_SPAN_DAYS)
+
+    # Posting-rate time series: items per week since the first item
+    weekly = np.bincount(((ts - first) // WEEK).astype(np.int64))
+    daily = np.bincount(((ts - first) // DAY).astype(np.int64))
+
+    hour_of_week = ((ts // HOUR).astype(np.int64) + _EPOCH_HOUR_OFFSET) % 168
+    heatmap = np.bincount(hour_of_week, minlength=168).reshape(7, 24)
+    by_hour = heatmap.sum(axis=0)
+    by_day = heatmap.sum(axis=1)
+
+    # Goh-Barabasi burstiness of inter-event times: -1 periodic, 0 Poisson, 1 maximally bursty
+    gaps = np.diff(ts)
+    burstiness = 0.0
+    if len(gaps) >= 2:
+        mu, sigma = gaps.mean(), gaps.std()
+        burstiness = float((sigma - mu) / (sigma + mu)) if sigma + mu > 0 else 0.0
+
+    recent = int(np.count_nonzero(ts >= now - RECENT_DAYS * DAY))
+
+    names, inverse, counts = np.unique(subreddit, return_inverse=True, return_counts=True)
+    score_sum = np.bincount(inverse, weights=score, minlength=len(names))
+    comment_counts = np.bincount(inverse, weights=is_comment.astype(np.float64), minlength=len(names))
+    last_active = np.full(len(names), -np.inf)
+    np.maximum.at(last_active, inverse, ts)
+    named = names != ''
+    shares = counts[named] / counts[named].sum() if named.any() else np.zeros(0)
+    entropy = float(-(shares * np.log(shares)).sum()) if len(shares) > 1 else 0.0
+    diversity = entropy / np.log(len(shares)) if len(shares) > 1 else 0.0
+
+    top = [i for i in np.argsort(-counts, kind='stable') if names[i]][:top_subreddits]
+
+    return {
+        'total': n,
+        'posts': int(n - is_comment.sum()),
+        'comments': int(is_comment.sum()),
+        'first_utc': float(first),
+        'last_utc': float(last),
+        'span_days': round(float(span_days), 2),
+        'listing_capped': len(posts) >= LISTING_CAP or len(comments) >= LISTING_CAP,
+        'items_per_day': round(n / rate_days, 3),
+        'recent_items_per_day': round(recent / RECENT_DAYS, 3),
+        'active_day_share': round(float(np.count_nonzero(daily)) / max(len(daily), 1), 3),
+        'peak_day_items': int(daily.max()),
+        'weekly_counts': weekly.tolist(),
+        'hour_of_week': heatmap.tolist(),
+        'by_hour': by_hour.tolist(),
+        'by_weekday': dict(zip(DAYS, by_day.tolist())),
+        'burstiness': round(burstiness, 3),
+        'median_gap_hours': round(float(np.median(gaps)) / HOUR, 2) if len(gaps) else None,
+        'subreddit_count': int(named.sum()),
+        'subreddit_diversity': round(float(diversity), 3),
+        'subreddits': [{
+            'subreddit': str(names[i]),
+            'items': int(counts[i]),
+            'share': round(float(counts[i]) / n, 3),
+            'comments': int(comment_counts[i]),
+            'mean_score': round(float(score_sum[i] / counts[i]), 2),
+            'last_active_utc': float(last_active[i]),
+        } for i in top],
+    }
+
+
+def peak_hours(by_hour: List[int], width: int = 4) -> int:
+    """Start hour (UTC) of the busiest `width`-hour window, wrapping around midnight"""
+    counts = np.asarray(by_hour, dtype=np.float64)
+    windows = np.convolve(np.concatenate([counts, counts[:width - 1]]), np.ones(width), mode='valid')
+    return int(np.argmax(windows[:24]))
+
+
+def main():
+    from dotenv import load_dotenv
+    from persona.reddit_fetcher import RedditFetcher
+
+    parser = argparse.ArgumentParser(description="Posting activity analytics for a Reddit user (no NLP)")
+    parser.add_argument("username")
+    parser.add_argument("--full", action="store_true", help="Include the weekly series and heatmap")
+    args = parser.parse_args()
+
+    load_dotenv()
+    fetcher = RedditFetcher(
+        client_id=os.getenv('REDDIT_CLIENT_ID'),
+        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+        user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaBot/1.0')
+    )
+    username = args.username.strip('/').split('/')[-1]
+    posts, comments = asyncio.run(fetcher.fetch_user_content(username))
+    start = time.perf_counter()
+    activity = analyze_activity(posts, comments)
+    elapsed = (time.perf_counter() - start) * 1000
+    if not args.full:
+        for key in ('weekly_counts', 'hour_of_week'):
+            activity.pop(key, None)
+    print(json.dumps(activity, indent=2))
+    print(f"⏱️ {activity['total']} items analyzed in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
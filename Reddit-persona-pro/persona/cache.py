@@ -0,0 +1,61 @@
+# reddit-persona-pro/persona/cache.py
+
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any
+
+
+def default_cache_dir() -> str:
+    """Root for on-disk artifacts (converted models, cascade labels); PERSONA_MODEL_CACHE overrides it"""
+    return os.getenv("PERSONA_MODEL_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "reddit-persona-pro"))
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 30.0, stale_after: float = 60.0):
+    """
+    Cross-process lock on `path` + ".lock" for read-modify-write of a shared cache file.
+
+    Uses an exclusively created lock file, so it works on any local filesystem.
+    A lock file older than `stale_after` seconds is assumed to belong to a
+    crashed process and is broken.
+    """
+    lock_path = path + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_after:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue  # released between the checks
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lock_path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def atomic_pickle_dump(path: str, obj: Any) -> None:
+    """Pickle `obj` to `path` under a temporary name and rename it, so readers never load a partial file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def deterministic_sample(text: str, rate: float) -> bool:
+    """Whether `text` falls in a `rate` fraction of texts, decided by a stable hash (same answer every run)"""
+    return (zlib.crc32(text.encode('utf-8')) % 10000) < rate * 10000
@@ -0,0 +1,394 @@
+# reddit-persona-pro/persona/cascade.py
+"""
+Cheap first-pass classifiers that let NLPAnalyzer skip the transformers for
+easy chunks.
+
+Stage 1 is a small sentiment lexicon plus rules for trivially short chunks
+("lol", "this.") and for chunks with no capitalized words, which cannot
+contain entities. Stage 2 is a scikit-learn model trained on the
+transformer labels the analyzer itself produced earlier, which are cached on
+disk as they are computed. Whatever neither stage is confident about is
+escalated to the transformers. A small, deterministic fraction of confident
+decisions is audited against the transformers to report agreement.
+
+The stage-2 model is retrained on a background thread as the label cache
+grows, so analysis calls never wait for a fit. Train it explicitly with:
+
+    python -m persona.cascade --train
+"""
+
+import argparse
+import json
+import os
+import pickle
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from persona.cache import atomic_pickle_dump, default_cache_dir, deterministic_sample
+
+POSITIVE_WORDS = {
+    "love", "loved", "great", "awesome", "amazing", "excellent", "fantastic", "happy", "glad",
+    "thanks", "thank", "beautiful", "perfect", "best", "enjoy", "enjoyed", "fun", "nice", "cool",
+    "wonderful", "brilliant", "helpful", "favorite", "favourite", "excited", "recommend", "good",
+}
+NEGATIVE_WORDS = {
+    "hate", "hated", "terrible", "awful", "horrible", "worst", "bad", "sad", "angry", "annoying",
+    "disappointed", "disappointing", "broken", "useless", "stupid", "garbage", "trash", "sucks",
+    "boring", "ugly", "wrong", "scam", "disaster", "fail", "failed", "pathetic", "ridiculous",
+}
+NEGATIONS = {"not", "no", "never", "dont", "don't", "isnt", "isn't", "wasnt", "wasn't", "cant", "can't", "nothing"}
+
+# Capitalized words that commonly start a sentence and are never entities on their own
+COMMON_CAPITALIZED = {
+    "a", "also", "an", "and", "are", "but", "did", "do", "does", "for", "he", "honestly", "how", "i",
+    "if", "im", "in", "is", "it", "its", "just", "lol", "maybe", "my", "no", "not", "oh", "ok", "on",
+    "same", "she", "so", "thanks", "that", "the", "there", "they", "this", "to", "we", "well", "what",
+    "when", "why", "yeah", "yes", "you",
+}
+_CAPITALIZED = re.compile(r"\b[A-Z][\w'-]*")
+_WORD = re.compile(r"[a-z']+")
+
+ENV_FLAG = "PERSONA_NLP_CASCADE"
+LABELS_FILE = "cascade_labels.jsonl"
+MODEL_FILE = "cascade_model.pkl"
+
+# Scores given to lexicon decisions until a model provides the transformer's own
+# mean confidences. The SST-2 pipeline reports 0.95-0.99 for clearly polar text,
+# and PersonaEngine averages scores across chunks, so lexicon decisions have to
+# sit on the same scale to leave the persona traits unchanged.
+DEFAULT_LEXICON_SCORES = {'POSITIVE': 0.98, 'NEGATIVE': 0.98, 'NEUTRAL': 0.95}
+
+
+class LabelCache:
+    """
+    Append-only JSONL cache of transformer outputs, keyed by task.
+
+    Sentiment records keep the label, topic records keep every topic score.
+    Shared by the cascade and the multi-task heads as training data.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_labels: int = 50000):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.path = os.path.join(self.cache_dir, LABELS_FILE)
+        self.max_labels = max_labels
+        self.count = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.count = sum(1 for _ in f)
+
+    def load(self) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # line still being appended by another writer
+        return records
+
+    def record(self, task: str, texts: List[str], results: List) -> int:
+        """Append transformer outputs; returns how many records were written"""
+        if self.count >= self.max_labels or not texts:
+            return 0
+        written = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for text, result in zip(texts, results):
+                if self.count >= self.max_labels:
+                    break
+                if task == 'sentiment':
+                    if result['label'] == 'NEUTRAL':  # analyzer error fallback, not a real label
+                        continue
+                    rec = {'task': task, 'text': text, 'label': result['label'], 'score': result['score']}
+                else:
+                    if not result:
+                        continue
+                    rec = {'task': task, 'text': text, 'scores': {t['topic']: t['score'] for t in result}}
+                f.write(json.dumps(rec) + '\n')
+                self.count += 1
+                written += 1
+        return written
+
+
+class _ConstantModel:
+    """Stand-in for a topic whose training labels contain a single class"""
+
+    def __init__(self, positive_rate: float):
+        self.positive_rate = positive_rate
+
+    def predict_proba(self, X):
+        return [[1 - self.positive_rate, self.positive_rate] for _ in range(X.shape[0])]
+
+
+class CascadeModel:
+    """Stage-2 scikit-learn classifiers for sentiment and per-topic relevance"""
+
+    def __init__(self, topics: List[str]):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.topics = list(topics)
+        self.vectorizer = HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False)
+        self.sentiment = None
+        self.sentiment_labels: List[str] = []
+        self.topic_models: Dict[str, Any] = {}
+        # Mean transformer confidence per sentiment label ('NEUTRAL': over all labels)
+        self.score_means: Dict[str, float] = {}
+        self.trained_on = 0
+
+    def fit(self, records: List[Dict]) -> "CascadeModel":
+        from sklearn.linear_model import LogisticRegression
+
+        sentiment = [r for r in records if r['task'] == 'sentiment']
+        if len({r['label'] for r in sentiment}) >= 2:
+            X = self.vectorizer.transform([r['text'] for r in sentiment])
+            self.sentiment = LogisticRegression(max_iter=1000).fit(X, [r['label'] for r in sentiment])
+            self.sentiment_labels = list(self.sentiment.classes_)
+        scored = [r for r in sentiment if 'score' in r]
+        if scored:
+            for label in {r['label'] for r in scored}:
+                values = [r['score'] for r in scored if r['label'] == label]
+                self.score_means[label] = sum(values) / len(values)
+            self.score_means['NEUTRAL'] = sum(r['score'] for r in scored) / len(scored)
+
+        topic = [r for r in records if r['task'] == 'topic']
+        if topic:
+            X = self.vectorizer.transform([r['text'] for r in topic])
+            for name in self.topics:
+                y = [int(r['scores'].get(name, 0.0) >= 0.5) for r in topic]
+                if 0 < sum(y) < len(y):
+                    self.topic_models[name] = LogisticRegression(max_iter=1000, class_weight='balanced').fit(X, y)
+                else:
+                    # Laplace-smoothed constant rate so an unseen class is not treated as impossible
+                    self.topic_models[name] = _ConstantModel((sum(y) + 1) / (len(y) + 2))
+
+        self.trained_on = len(records)
+        return self
+
+    def predict_sentiment(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if self.sentiment is None:
+            return [None] * len(texts)
+        probs = self.sentiment.predict_proba(self.vectorizer.transform(texts))
+        out = []
+        for row in probs:
+            best = max(range(len(row)), key=lambda i: row[i])
+            out.append({'label': self.sentiment_labels[best], 'score': float(row[best])})
+        return out
+
+    def predict_topics(self, texts: List[str]) -> List[Optional[Dict[str, float]]]:
+        if not self.topic_models or set(self.topic_models) != set(self.topics):
+            return [None] * len(texts)
+        X = self.vectorizer.transform(texts)
+        per_topic = {name: model.predict_proba(X) for name, model in self.topic_models.items()}
+        return [{name: float(per_topic[name][i][1]) for name in self.topics} for i in range(len(texts))]
+
+
+class Cascade:
+    """
+    Decides easy chunks cheaply and tracks escalation and agreement.
+
+    Args:
+        topics: Candidate topics used by the zero-shot classifier.
+        sentiment_threshold: Minimum stage-2 probability to accept a sentiment label.
+        topic_threshold: Each topic probability must be >= this or <= 1 - this to accept.
+        lexicon_margin: Net positive/negative lexicon hits needed to accept without a model.
+        min_words: Chunks shorter than this with no lexicon signal are decided as neutral.
+        audit_rate: Fraction of confident decisions also sent to the transformers.
+        cache_dir: Where the label cache and trained model live.
+        max_labels: Stop caching transformer labels beyond this many records.
+        min_train: Labels required before a stage-2 model is trained.
+    """
+
+    def __init__(self, topics: List[str], sentiment_threshold: float = 0.9, topic_threshold: float = 0.9,
+                 lexicon_margin: int = 2, min_words: int = 4, audit_rate: float = 0.05,
+                 cache_dir: Optional[str] = None, max_labels: int = 50000, min_train: int = 300):
+        self.topics = list(topics)
+        self.sentiment_threshold = sentiment_threshold
+        self.topic_threshold = topic_threshold
+        self.lexicon_margin = lexicon_margin
+        self.min_words = min_words
+        self.audit_rate = audit_rate
+        self.max_labels = max_labels
+        self.min_train = min_train
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.labels = LabelCache(self.cache_dir, max_labels)
+        self.model_path = os.path.join(self.cache_dir, MODEL_FILE)
+        self.model: Optional[CascadeModel] = None
+        self._training: Optional[threading.Thread] = None
+        self.stats = {
+            task: {'total': 0, 'decided': 0, 'escalated': 0, 'audited': 0, 'agreed': 0}
+            for task in ('sentiment', 'topic', 'ner')
+        }
+        self._load_model()
+
+    # -- persistence -----------------------------------------------------
+
+    def _load_model(self):
+        if os.path.exists(self.model_path):
+            try:
+                with open(self.model_path, 'rb') as f:
+                    model = pickle.load(f)
+                if model.topics == self.topics:
+                    self.model = model
+            except Exception as e:
+                print(f"⚠️ Could not load cascade model: {e}")
+        self._maybe_train()
+
+    def _maybe_train(self):
+        # Retrain once the label cache has grown by a quarter since the last fit,
+        # off the analysis path: the current model keeps serving until the new one is ready
+        trained_on = self.model.trained_on if self.model else 0
+        if self.labels.count < self.min_train or self.labels.count <= trained_on * 1.25:
+            return
+        if self._training is not None and self._training.is_alive():
+            return
+        self._training = threading.Thread(target=self._train_in_background, name="cascade-train", daemon=True)
+        self._training.start()
+
+    def _train_in_background(self):
+        try:
+            self.train()
+        except Exception as e:
+            print(f"⚠️ Cascade training failed: {e}")
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> None:
+        """Block until a background retrain (if any) has finished"""
+        if self._training is not None:
+            self._training.join(timeout)
+
+    def train(self) -> Optional[CascadeModel]:
+        """Fit the stage-2 model on the cached transformer labels and persist it"""
+        records = self.labels.load()
+        if not records:
+            return None
+        model = CascadeModel(self.topics).fit(records)
+        atomic_pickle_dump(self.model_path, model)
+        self.model = model
+        return model
+
+    def record(self, task: str, texts: List[str], results: List) -> None:
+        """Append transformer outputs to the label cache (training data for stage 2)"""
+        if self.labels.record(task, texts, results):
+            self._maybe_train()
+
+    # -- decisions -------------------------------------------------------
+
+    def should_audit(self, text: str) -> bool:
+        return deterministic_sample(text, self.audit_rate)
+
+    def _lexicon(self, text: str):
+        words = _WORD.findall(text.lower())
+        pos = neg = 0
+        for i, word in enumerate(words):
+            negated = any(w in NEGATIONS for w in words[max(0, i - 2):i])
+            if word in POSITIVE_WORDS:
+                neg, pos = (neg + 1, pos) if negated else (neg, pos + 1)
+            elif word in NEGATIVE_WORDS:
+                pos, neg = (pos + 1, neg) if negated else (pos, neg + 1)
+        return words, pos, neg
+
+    def lexicon_score(self, label: str) -> float:
+        """Score for a lexicon decision, on the transformer's confidence scale"""
+        means = getattr(self.model, 'score_means', None) or {}
+        return means.get(label, DEFAULT_LEXICON_SCORES[label])
+
+    def sentiment(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Confident sentiment decisions, or None where the chunk must be escalated"""
+        decisions: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        undecided = []
+        for i, text in enumerate(texts):
+            words, pos, neg = self._lexicon(text)
+            if pos - neg >= self.lexicon_margin:
+                decisions[i] = {'label': 'POSITIVE', 'score': self.lexicon_score('POSITIVE')}
+            elif neg - pos >= self.lexicon_margin:
+                decisions[i] = {'label': 'NEGATIVE', 'score': self.lexicon_score('NEGATIVE')}
+            elif len(words) < self.min_words and pos == neg == 0:
+                decisions[i] = {'label': 'NEUTRAL', 'score': self.lexicon_score('NEUTRAL')}
+            else:
+                undecided.append(i)
+
+        if self.model and undecided:
+            predictions = self.model.predict_sentiment([texts[i] for i in undecided])
+            for i, pred in zip(undecided, predictions):
+                if pred and pred['score'] >= self.sentiment_threshold:
+                    decisions[i] = pred
+        self._count('sentiment', decisions)
+        return decisions
+
+    def topics_for(self, texts: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+        """Confident topic lists (zero-shot format), or None where the chunk must be escalated"""
+        decisions: List[Optional[List[Dict[str, Any]]]] = [None] * len(texts)
+        undecided = []
+        for i, text in enumerate(texts):
+            if len(_WORD.findall(text.lower())) < self.min_words:
+                decisions[i] = []
+            else:
+                undecided.append(i)
+
+        if self.model and undecided:
+            predictions = self.model.predict_topics([texts[i] for i in undecided])
+            low = 1 - self.topic_threshold
+            for i, scores in zip(undecided, predictions):
+                if scores and all(s >= self.topic_threshold or s <= low for s in scores.values()):
+                    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+                    decisions[i] = [{'topic': t, 'score': s} for t, s in ranked]
+        self._count('topic', decisions)
+        return decisions
+
+    def needs_entities(self, text: str) -> bool:
+        """NER can only find something if the chunk has a capitalized word, acronym or number"""
+        escalate = any(ch.isdigit() for ch in text) or any(
+            re.sub(r"\W", "", word.lower()) not in COMMON_CAPITALIZED for word in _CAPITALIZED.findall(text)
+        )
+        self.stats['ner']['total'] += 1
+        self.stats['ner']['escalated' if escalate else 'decided'] += 1
+        return escalate
+
+    # -- reporting -------------------------------------------------------
+
+    def _count(self, task: str, decisions: List) -> None:
+        stats = self.stats[task]
+        stats['total'] += len(decisions)
+        decided = sum(d is not None for d in decisions)
+        stats['decided'] += decided
+        stats['escalated'] += len(decisions) - decided
+
+    def record_audit(self, task: str, agreed: bool) -> None:
+        self.stats[task]['audited'] += 1
+        self.stats[task]['agreed'] += int(agreed)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Escalation rate and audited agreement per task"""
+        out = {}
+        for task, s in self.stats.items():
+            out[task] = {
+                **s,
+                'escalation_rate': s['escalated'] / s['total'] if s['total'] else 0.0,
+                'agreement': s['agreed'] / s['audited'] if s['audited'] else None,
+            }
+        return out
+
+
+def main():
+    from persona.nlp_analyzer import CANDIDATE_TOPICS
+
+    parser = argparse.ArgumentParser(description="Manage the NLPAnalyzer cascade model")
+    parser.add_argument("--train", action="store_true", help="Retrain from the cached transformer labels")
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+
+    cascade = Cascade(CANDIDATE_TOPICS, cache_dir=args.cache_dir)
+    print(f"📚 {cascade.labels.count} cached labels in {cascade.labels.path}")
+    if args.train:
+        cascade.wait_for_training()
+        model = cascade.train()
+        if model is None:
+            print("⚠️ No cached labels yet; run the analyzer with cascade enabled first.")
+        else:
+            print(f"✅ Cascade model trained on {model.trained_on} labels -> {cascade.model_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 # reddit-persona-pro/persona/content_preprocessor.py
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import re
 import uuid
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
+from persona.records import ContentItem
 
 nltk.download('punkt')
 nltk.download('stopwords')
@@ -50,22 +51,29 @@ class ContentPreprocessor:
             chunks.append(' '.join(current_chunk))
         return chunks
 
-    def tag_content(self, content: Dict) -> Dict[str, str]:
+    def tag_content(self, content: Dict) -> ContentItem:
         """Attach metadata and UUID tags to the content"""
         raw_text = content.get('body', content.get('selftext', ''))
         cleaned = self.clean_text(raw_text)
-        tagged = {
-            'id': str(uuid.uuid4()),
-            'text': cleaned,
-            'type': 'comment' if 'body' in content else 'post',
-            'subreddit': content.get('subreddit', ''),
-            'created_utc': content.get('created_utc', ''),
-            'score': content.get('score', 0)
-        }
-        return tagged
+        return ContentItem(
+            id=str(uuid.uuid4()),
+            text=cleaned,
+            type='comment' if 'body' in content else 'post',
+            subreddit=content.get('subreddit', ''),
+            created_utc=content.get('created_utc', 0.0),
+            score=content.get('score', 0)
+        )
 
-    def clean_and_chunk(self, posts: List[Dict], comments: List[Dict], max_items: int = 100) -> Tuple[List[Dict], List[Dict]]:
-        """Full pipeline for cleaning, tagging, and chunking posts/comments"""
+    def _chunks_for(self, text: str) -> Tuple[str, ...]:
+        # clean_text already collapsed whitespace, so short texts are their own single chunk
+        if not text:
+            return ()
+        if len(text) < self.chunk_size:
+            return (text,)
+        return tuple(self.chunk_content(text))
+
+    def clean_and_chunk(self, posts: List[Dict], comments: List[Dict], max_items: Optional[int] = 100) -> Tuple[List[ContentItem], List[ContentItem]]:
+        """Full pipeline for cleaning, tagging, and chunking posts/comments (max_items=None keeps everything)"""
         posts = sorted([p for p in posts if p.get('selftext')], key=lambda x: x.get('score', 0), reverse=True)[:max_items]
         comments = sorted([c for c in comments if c.get('body')], key=lambda x: x.get('score', 0), reverse=True)[:max_items]
 
@@ -74,6 +82,6 @@ class ContentPreprocessor:
         processed_comments = [self.tag_content(comment) for comment in comments if comment.get('body')]
 
         for item in processed_posts + processed_comments:
-            item['chunks'] = self.chunk_content(item['text'])
+            item.chunks = self._chunks_for(item.text)
 
         return processed_posts, processed_comments
@@ -0,0 +1,302 @@
+# reddit-persona-pro/persona/distributed.py
+"""
+Distributed mode: a coordinator enqueues usernames, workers on any number of
+nodes claim them from a shared queue and run the full pipeline.
+
+    python -m persona.distributed enqueue --file users.txt
+    python -m persona.distributed worker --processes 4
+    python -m persona.distributed status --watch 10
+
+Every worker process keeps one warm PersonaPipeline. Jobs are leased and
+the lease is renewed while the job runs; a job whose worker dies becomes
+claimable again once its lease expires. Outputs are keyed by username and
+moved into place atomically, so a job that ends up running twice leaves one
+complete copy of each file.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, Optional
+
+from persona.job_queue import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, Job, JobQueue, open_queue
+
+DEFAULT_QUEUE_URL = "sqlite:///output/queue.db"
+DEFAULT_OUTPUT_DIR = os.path.join("output", "distributed")
+
+
+def default_queue_url() -> str:
+    return os.getenv("PERSONA_QUEUE_URL", DEFAULT_QUEUE_URL)
+
+
+def write_json_atomic(path: str, data: Dict) -> None:
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+class Worker:
+    """
+    Claims jobs from a JobQueue and runs them through one PersonaPipeline.
+
+    Args:
+        queue: Shared job queue.
+        pipeline: Warm-able PersonaPipeline (its output_dir receives the results).
+        worker_id: Lease owner name (default: <host>-<pid>).
+        lease_seconds: Lease length; it is renewed every third of this while a job runs.
+        poll_interval: Seconds to wait when the queue has nothing claimable.
+        exit_when_empty: Stop once no pending or running jobs remain.
+        render_pdf: Also render the PDF report (the persona JSON is always written).
+        activity_only: Only fetch and compute activity analytics; no models are loaded.
+    """
+
+    def __init__(self, queue: JobQueue, pipeline, worker_id: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = 5.0,
+                 exit_when_empty: bool = False, render_pdf: bool = True, activity_only: bool = False):
+        self.queue = queue
+        self.pipeline = pipeline
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.exit_when_empty = exit_when_empty
+        self.render_pdf = render_pdf
+        self.activity_only = activity_only
+        self.processed = 0
+        self.failed = 0
+
+    async def _process(self, job: Job) -> Dict:
+        """Run one user end to end and write its outputs; returns the result record"""
+        username = job.username
+        start = time.perf_counter()
+        if self.activity_only:
+            activity = await self.pipeline.profile_activity(username)
+            json_path = os.path.join(self.pipeline.output_dir, f"{username}_activity.json")
+            write_json_atomic(json_path, {
+                'username': username,
+                'run_id': job.run_id,
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'activity': activity,
+            })
+            return {'username': username, 'activity': json_path, 'seconds': round(time.perf_counter() - start, 3)}
+
+        built = await self.pipeline.build(username)
+        if built is None:
+            return {'username': username, 'empty': True}
+
+        cited, summary = built
+        json_path = os.path.join(self.pipeline.output_dir, f"{username}_persona.json")
+        write_json_atomic(json_path, {
+            'username': username,
+            'run_id': job.run_id,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'persona': cited,
+            'summary': summary,
+            'activity': self.pipeline.last_activity,
+            # Ingested into the similarity index with `python -m persona.similarity add`
+            'features': None if self.pipeline.last_features is None else self.pipeline.last_features.tolist(),
+        })
+        result = {'username': username, 'persona': json_path}
+        if self.render_pdf:
+            result['pdf'] = await self.pipeline.render(username, cited, summary)
+        result['timings'] = dict(self.pipeline.last_timings)
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def _keep_lease(self, job: Job, task: asyncio.Task) -> bool:
+        """Renew the lease until the task finishes; cancels it and returns True if the lease is lost"""
+        interval = max(self.lease_seconds / 3.0, 1.0)
+        while not task.done():
+            await asyncio.sleep(interval)
+            if not self.queue.heartbeat(job, self.lease_seconds):
+                print(f"⚠️ Lost the lease on u/{job.username}; abandoning it")
+                task.cancel()
+                return True
+        return False
+
+    async def run_job(self, job: Job) -> bool:
+        """Process a claimed job and report the outcome to the queue"""
+        print(f"🔧 [{self.worker_id}] u/{job.username} (attempt {job.attempts})")
+        task = asyncio.ensure_future(self._process(job))
+        keeper = asyncio.ensure_future(self._keep_lease(job, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if keeper.done() and not keeper.cancelled() and keeper.result():
+                # Another worker owns the job now and will report it
+                return False
+            self.queue.release(job)
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ [{self.worker_id}] u/{job.username} failed: {e}")
+            self.queue.fail(job, f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+            return False
+        finally:
+            keeper.cancel()
+
+        if not self.queue.complete(job, json.dumps(result)):
+            print(f"⚠️ u/{job.username} finished after its lease moved to another worker")
+            return False
+        self.processed += 1
+        print(f"✅ [{self.worker_id}] u/{job.username} done in {result.get('seconds', 0):.1f}s")
+        return True
+
+    async def run(self):
+        if not self.activity_only:
+            await self.pipeline.warm_up()
+        print(f"🚀 Worker {self.worker_id} ready")
+        while True:
+            job = self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                counts = self.queue.stats()['counts']
+                if self.exit_when_empty and counts['pending'] == 0 and counts['running'] == 0:
+                    break
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self.run_job(job)
+        print(f"🏁 Worker {self.worker_id}: {self.processed} done, {self.failed} failed")
+
+
+def _worker_process(queue_url: str, options: Dict):
+    """Entry point of one worker process (also used in-process for --processes 1)"""
+    from dotenv import load_dotenv
+    from persona.pipeline import DEFAULT_TIER, PersonaPipeline
+
+    load_dotenv()
+    queue = open_queue(queue_url)
+    pipeline = PersonaPipeline(output_dir=options['output_dir'], tier=options['tier'] or DEFAULT_TIER,
+                               backend=options['backend'],
+                               cascade=options['cascade'], multitask=options['multitask'],
+                               topic_prior=options['topic_prior'],
+                               # The index is single-writer; workers put the vector in each persona JSON instead
+                               similarity_index=False)
+    worker = Worker(queue, pipeline, lease_seconds=options['lease'], poll_interval=options['poll'],
+                    exit_when_empty=options['exit_when_empty'], render_pdf=not options['no_pdf'],
+                    activity_only=options['activity_only'])
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.close()
+        queue.close()
+
+
+def print_status(queue: JobQueue, run_id: Optional[str] = None, window: float = 60.0):
+    stats = queue.stats(run_id, window_seconds=window)
+    counts = stats['counts']
+    finished = counts['done'] + counts['failed']
+    rate = stats['completed_per_min']
+    remaining = counts['pending'] + counts['running']
+    eta = f", ETA {remaining / rate:.0f} min" if rate and remaining else ""
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {finished}/{stats['total']} finished "
+          f"(done {counts['done']}, failed {counts['failed']}, running {counts['running']}, "
+          f"pending {counts['pending']}) | {rate:.1f} users/min over {window:.0f}s, "
+          f"{stats['active_workers']} active workers{eta}")
+    return stats
+
+
+def main():
+    # The coordinator and status commands must not need the NLP stack, so the
+    # pipeline is only imported inside worker processes
+    from persona.inference_backends import BACKENDS
+    from persona.sampler import SAMPLING_TIERS
+
+    parser = argparse.ArgumentParser(description="Distributed persona generation")
+    parser.add_argument("--queue", default=None, help=f"Queue URL (default: PERSONA_QUEUE_URL or {DEFAULT_QUEUE_URL})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add usernames to the queue")
+    enqueue.add_argument("usernames", nargs="*")
+    enqueue.add_argument("--file", help="File with one username (or profile URL) per line")
+    enqueue.add_argument("--run-id", default=None, help="Run name (default: current timestamp)")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    worker = commands.add_parser("worker", help="Claim and process jobs")
+    worker.add_argument("--processes", type=int, default=1, help="Worker processes on this node")
+    worker.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Lease length in seconds")
+    worker.add_argument("--poll", type=float, default=5.0, help="Idle poll interval in seconds")
+    worker.add_argument("--exit-when-empty", action="store_true", help="Stop once the queue is drained")
+    worker.add_argument("--no-pdf", action="store_true", help="Only write the persona JSON")
+    worker.add_argument("--activity-only", action="store_true",
+                        help="Only fetch and write activity analytics (<username>_activity.json), no NLP")
+    worker.add_argument("--tier", default=None, choices=list(SAMPLING_TIERS), help="Inference budget tier")
+    worker.add_argument("--backend", default=None, choices=list(BACKENDS), help="NLP inference backend")
+    worker.add_argument("--cascade", action="store_true", default=None)
+    worker.add_argument("--multitask", action="store_true", default=None)
+    worker.add_argument("--topic-prior", action="store_true", default=None)
+
+    status = commands.add_parser("status", help="Show queue progress and throughput")
+    status.add_argument("--run-id", default=None)
+    status.add_argument("--watch", type=float, default=0, help="Refresh every N seconds")
+    status.add_argument("--window", type=float, default=60.0, help="Throughput window in seconds")
+    status.add_argument("--failures", action="store_true", help="List failed jobs")
+
+    args = parser.parse_args()
+    queue_url = args.queue or default_queue_url()
+
+    if args.command == "enqueue":
+        names = list(args.usernames)
+        if args.file:
+            with open(args.file, encoding='utf-8') as f:
+                names.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        names = [n.strip('/').split('/')[-1] for n in names]
+        run_id = args.run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        queue = open_queue(queue_url)
+        added = queue.enqueue(names, run_id, max_attempts=args.max_attempts)
+        print(f"📥 Enqueued {added} users in run '{run_id}' ({len(names) - added} already queued)")
+        queue.close()
+
+    elif args.command == "worker":
+        options = {
+            'output_dir': args.output_dir, 'tier': args.tier, 'backend': args.backend,
+            'cascade': args.cascade, 'multitask': args.multitask, 'topic_prior': args.topic_prior,
+            'lease': args.lease, 'poll': args.poll, 'exit_when_empty': args.exit_when_empty,
+            'no_pdf': args.no_pdf, 'activity_only': args.activity_only,
+        }
+        if args.processes <= 1:
+            _worker_process(queue_url, options)
+            return
+        # Separate processes, not threads: each loads its own models and runs inference in parallel
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_worker_process, args=(queue_url, options)) for _ in range(args.processes)]
+        for p in procs:
+            p.start()
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.join()
+
+    else:
+        queue = open_queue(queue_url)
+        try:
+            while True:
+                print_status(queue, args.run_id, args.window)
+                if args.failures:
+                    for row in queue.failures(args.run_id):
+                        error = (row['error'] or '').splitlines()[0] if row['error'] else ''
+                        print(f"   ❌ u/{row['username']} ({row['run_id']}, {row['attempts']} attempts): {error}")
+                if not args.watch:
+                    break
+                time.sleep(args.watch)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# reddit-persona-pro/persona/inference_backends.py
+"""
+CPU-friendly inference backends for the NLPAnalyzer pipelines.
+
+    pytorch    full-precision HF checkpoints (the original behaviour)
+    quantized  PyTorch dynamic int8 quantization of all Linear layers
+    onnx       ONNX Runtime export via optimum
+    onnx-int8  ONNX Runtime export with dynamic int8 quantization
+
+Converted artifacts are cached on disk, so conversion happens once per host.
+The ONNX backends need `optimum[onnxruntime]`, which is optional.
+
+Parity against the PyTorch reference:
+
+    python -m persona.inference_backends --backend onnx-int8
+"""
+
+import argparse
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from persona.cache import default_cache_dir
+
+BACKENDS = ("pytorch", "quantized", "onnx", "onnx-int8")
+DEFAULT_BACKEND = "pytorch"
+
+# Pinned to the checkpoints transformers' pipeline() picks by default for these tasks
+MODELS = {
+    "ner": ("ner", "dbmdz/bert-large-cased-finetuned-conll03-english"),
+    "sentiment": ("sentiment-analysis", "distilbert/distilbert-base-uncased-finetuned-sst-2-english"),
+    "topic": ("zero-shot-classification", "facebook/bart-large-mnli"),
+}
+
+# transformers classes by name; torch and transformers are imported only when a model is loaded
+_AUTO_MODELS = {
+    "ner": "AutoModelForTokenClassification",
+    "sentiment": "AutoModelForSequenceClassification",
+    "topic": "AutoModelForSequenceClassification",
+}
+
+
+def _artifact_dir(cache_dir: str, model_name: str, backend: str) -> str:
+    return os.path.join(cache_dir, backend, re.sub(r'[^\w.-]+', '--', model_name))
+
+
+def _load_quantized(kind: str, model_name: str, cache_dir: str):
+    """PyTorch dynamic int8 model; the quantized weights are cached as a state dict"""
+    import torch
+    import transformers
+    from transformers import AutoConfig, AutoTokenizer
+
+    auto_model = getattr(transformers, _AUTO_MODELS[kind])
+    path = _artifact_dir(cache_dir, model_name, "quantized")
+    weights = os.path.join(path, "quantized_state_dict.pt")
+
+    if os.path.exists(weights):
+        # Build the architecture without fetching fp32 weights, then load the int8 ones
+        model = auto_model.from_config(AutoConfig.from_pretrained(path))
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(weights, map_location="cpu", weights_only=True))
+        tokenizer = AutoTokenizer.from_pretrained(path)
+    else:
+        model = auto_model.from_pretrained(model_name)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(path, exist_ok=True)
+        model.config.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+        torch.save(model.state_dict(), weights)
+
+    model.eval()
+    return model, tokenizer
+
+
+def _load_onnx(kind: str, model_name: str, cache_dir: str, quantize: bool):
+    """ONNX Runtime model exported (and optionally int8-quantized) through optimum"""
+    from transformers import AutoTokenizer
+
+    try:
+        from optimum.onnxruntime import (
+            ORTModelForSequenceClassification,
+            ORTModelForTokenClassification,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise ImportError(
+            "The ONNX backends require optimum with ONNX Runtime: pip install 'optimum[onnxruntime]'"
+        ) from e
+
+    ort_model = ORTModelForTokenClassification if kind == "ner" else ORTModelForSequenceClassification
+    backend = "onnx-int8" if quantize else "onnx"
+    path = _artifact_dir(cache_dir, model_name, backend)
+    model_file = "model_quantized.onnx" if quantize else "model.onnx"
+
+    if not os.path.exists(os.path.join(path, model_file)):
+        export_path = _artifact_dir(cache_dir, model_name, "onnx")
+        if not os.path.exists(os.path.join(export_path, "model.onnx")):
+            model = ort_model.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_path)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_path)
+        if quantize:
+            quantizer = ORTQuantizer.from_pretrained(export_path)
+            quantizer.quantize(
+                save_dir=path,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+            )
+            AutoTokenizer.from_pretrained(export_path).save_pretrained(path)
+
+    model = ort_model.from_pretrained(path, file_name=model_file)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return model, tokenizer
+
+
+def load_pipeline(kind: str, backend: str = DEFAULT_BACKEND, device: int = -1, cache_dir: Optional[str] = None):
+    """
+    Build the HF pipeline for one analyzer task on the requested backend.
+
+    Args:
+        kind: One of MODELS ("ner", "sentiment", "topic").
+        backend: One of BACKENDS.
+        device: CUDA device index, or -1 for CPU. Only the pytorch backend uses the GPU.
+        cache_dir: Where converted artifacts live (default: PERSONA_MODEL_CACHE or ~/.cache).
+
+    Returns:
+        A transformers pipeline with the usual call interface.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown NLP backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if kind not in MODELS:
+        raise ValueError(f"Unknown analyzer task '{kind}'. Choose from: {', '.join(MODELS)}")
+
+    from transformers import pipeline
+
+    task, model_name = MODELS[kind]
+    if backend == "pytorch":
+        return pipeline(task, model=model_name, device=device)
+
+    cache_dir = cache_dir or default_cache_dir()
+    if backend == "quantized":
+        model, tokenizer = _load_quantized(kind, model_name, cache_dir)
+    else:
+        model, tokenizer = _load_onnx(kind, model_name, cache_dir, quantize=(backend == "onnx-int8"))
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+
+def _entity_set(entities: List[Dict[str, Any]]) -> set:
+    return {(e['entity'], e['word']) for e in entities}
+
+
+def parity_report(candidate, reference, texts: List[str]) -> Dict[str, float]:
+    """
+    Compare two NLPAnalyzer instances on the same texts.
+
+    Returns agreement rates (1.0 = identical decisions) and the largest
+    absolute score differences for each task.
+    """
+    report = {}
+
+    cand_sent = candidate.analyze_sentiments_batch(texts)
+    ref_sent = reference.analyze_sentiments_batch(texts)
+    report['sentiment_label_agreement'] = sum(
+        c['label'] == r['label'] for c, r in zip(cand_sent, ref_sent)) / max(len(texts), 1)
+    report['sentiment_max_score_diff'] = max(
+        (abs(c['score'] - r['score']) for c, r in zip(cand_sent, ref_sent)), default=0.0)
+
+    cand_topics = candidate.extract_topics_batch(texts)
+    ref_topics = reference.extract_topics_batch(texts)
+    top1 = 0
+    max_diff = 0.0
+    for c, r in zip(cand_topics, ref_topics):
+        if c and r and c[0]['topic'] == r[0]['topic']:
+            top1 += 1
+        ref_scores = {t['topic']: t['score'] for t in r}
+        for t in c:
+            max_diff = max(max_diff, abs(t['score'] - ref_scores.get(t['topic'], 0.0)))
+    report['topic_top1_agreement'] = top1 / max(len(texts), 1)
+    report['topic_max_score_diff'] = max_diff
+
+    matched = total = 0
+    for text in texts:
+        c = _entity_set(candidate.extract_entities(text))
+        r = _entity_set(reference.extract_entities(text))
+        matched += len(c & r)
+        total += len(c | r)
+    report['entity_jaccard'] = matched / total if total else 1.0
+    return report
+
+
+PARITY_TEXTS = [
+    "I moved from Berlin to Toronto last year and honestly the winters are brutal.",
+    "lol",
+    "The new GPU drivers fixed my stuttering in Elden Ring, finally!",
+    "Does anyone know a good sourdough recipe that doesn't take three days?",
+    "The senate vote on the bill was a complete disaster for everyone involved.",
+    "Just finished my first marathon in Chicago. Legs are dead but I'm so happy.",
+    "Apple and Microsoft both announced layoffs this week, markets barely moved.",
+    "My doctor says I need to cut back on coffee, which is honestly devastating.",
+]
+
+
+def main():
+    from persona.nlp_analyzer import NLPAnalyzer
+
+    parser = argparse.ArgumentParser(description="Check an NLP backend against the PyTorch reference")
+    parser.add_argument("--backend", required=True, choices=[b for b in BACKENDS if b != "pytorch"])
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    reference = NLPAnalyzer(backend="pytorch")
+    candidate = NLPAnalyzer(backend=args.backend)
+    report = parity_report(candidate, reference, PARITY_TEXTS)
+    print(json.dumps(report, indent=2))
+
+    agreements = [v for k, v in report.items() if 'agreement' in k or 'jaccard' in k]
+    if min(agreements) < args.min_agreement:
+        print(f"❌ Backend '{args.backend}' is below the {args.min_agreement:.0%} agreement threshold")
+        raise SystemExit(1)
+    print(f"✅ Backend '{args.backend}' matches the PyTorch reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# reddit-persona-pro/persona/job_queue.py
+
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 30
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """A claimed unit of work: one username within one run"""
+
+    __slots__ = ('id', 'run_id', 'username', 'attempts', 'lease_owner', 'lease_expires')
+
+    def __init__(self, id: int, run_id: str, username: str, attempts: int, lease_owner: str, lease_expires: float):
+        self.id = id
+        self.run_id = run_id
+        self.username = username
+        self.attempts = attempts
+        self.lease_owner = lease_owner
+        self.lease_expires = lease_expires
+
+    def __repr__(self) -> str:
+        return f"Job(id={self.id}, run_id={self.run_id!r}, username={self.username!r}, attempts={self.attempts})"
+
+
+class JobQueue(ABC):
+    """
+    Interface for the distributed-mode work queue.
+
+    Jobs are leased rather than popped: a worker that dies simply lets its
+    lease expire and the job becomes claimable again, up to max_attempts.
+    Every state-changing call names the worker, and a call from a worker
+    that no longer holds the lease is rejected (returns False), so a slow
+    worker cannot overwrite the outcome recorded by the worker that
+    re-claimed its job.
+    """
+
+    @abstractmethod
+    def enqueue(self, usernames: Iterable[str], run_id: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Add jobs; usernames already in the run are ignored. Returns how many were added."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Lease the next available job, or None if there is nothing to do right now"""
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease; False means the lease was lost and the work should be abandoned"""
+
+    @abstractmethod
+    def complete(self, job: Job, result: str = "") -> bool:
+        """Record the result; False if the lease was lost"""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failed attempt; the job is retried after a backoff until max_attempts"""
+
+    @abstractmethod
+    def release(self, job: Job) -> bool:
+        """Give the job back without consuming an attempt (e.g. on worker shutdown)"""
+
+    @abstractmethod
+    def stats(self, run_id: Optional[str] = None, window_seconds: float = 60.0) -> Dict:
+        """Counts per state, recent throughput and per-worker completions"""
+
+    @abstractmethod
+    def failures(self, run_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Most recent permanently failed jobs"""
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    JobQueue on a single SQLite file (WAL mode).
+
+    Suitable for several worker processes on one box, or for tests. SQLite
+    locking is not reliable over network filesystems, so real multi-node
+    deployments should plug in a networked backend behind the same interface.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            available_at REAL NOT NULL,
+            enqueued_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            finished_by TEXT,
+            result TEXT,
+            error TEXT,
+            UNIQUE (run_id, username)
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+        CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Autocommit mode; multi-statement changes use explicit BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, usernames: Iterable[str], run_id: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        now = time.time()
+        rows = [(run_id, u.strip(), PENDING, max_attempts, now, now) for u in usernames if u and u.strip()]
+        self._transaction()
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (run_id, username, status, max_attempts, available_at, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        now = time.time()
+        self._transaction()
+        try:
+            # Expired leases that have used up their attempts are failed, not re-run
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', finished_at = ?, lease_owner = NULL "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, RUNNING, now))
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, now, RUNNING, now)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            expires = now + lease_seconds
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE id = ?",
+                (RUNNING, worker_id, expires, now, row['id']))
+            job_row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return Job(job_row['id'], job_row['run_id'], job_row['username'], job_row['attempts'], worker_id, expires)
+
+    def _update_owned(self, job: Job, sql: str, params: tuple) -> bool:
+        cursor = self.conn.execute(
+            sql + " WHERE id = ? AND status = ? AND lease_owner = ?",
+            params + (job.id, RUNNING, job.lease_owner))
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job: Job, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        expires = time.time() + lease_seconds
+        ok = self._update_owned(job, "UPDATE jobs SET lease_expires = ?", (expires,))
+        if ok:
+            job.lease_expires = expires
+        return ok
+
+    def complete(self, job: Job, result: str = "") -> bool:
+        return self._update_owned(
+            job, "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, finished_by = ?, "
+                 "lease_owner = NULL",
+            (DONE, result, time.time(), job.lease_owner))
+
+    def fail(self, job: Job, error: str) -> bool:
+        now = time.time()
+        return self._update_owned(
+            job, "UPDATE jobs SET "
+                 "status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+                 "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END, "
+                 "available_at = ? + ? * attempts, error = ?, lease_owner = NULL",
+            (FAILED, PENDING, now, now, RETRY_BACKOFF_SECONDS, error[:2000]))
+
+    def release(self, job: Job) -> bool:
+        return self._update_owned(
+            job, "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_owner = NULL, available_at = ?",
+            (PENDING, time.time()))
+
+    def stats(self, run_id: Optional[str] = None, window_seconds: float = 60.0) -> Dict:
+        where, params = ("WHERE run_id = ?", (run_id,)) if run_id else ("", ())
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for row in self.conn.execute(f"SELECT status, COUNT(*) AS n FROM jobs {where} GROUP BY status", params):
+            counts[row['status']] = row['n']
+
+        since = time.time() - window_seconds
+        recent_where = "WHERE status = ? AND finished_at >= ?" + (" AND run_id = ?" if run_id else "")
+        recent_params = (DONE, since) + params
+        per_worker = {
+            row['finished_by']: row['n'] for row in self.conn.execute(
+                f"SELECT finished_by, COUNT(*) AS n FROM jobs {recent_where} GROUP BY finished_by", recent_params)
+        }
+        recent = sum(per_worker.values())
+        # Owners of expired leases are dead or stalled workers, not active ones
+        active = {
+            row['lease_owner'] for row in self.conn.execute(
+                "SELECT DISTINCT lease_owner FROM jobs WHERE status = ? AND lease_expires > ?"
+                + (" AND run_id = ?" if run_id else ""), (RUNNING, time.time()) + params)
+        }
+        return {
+            'counts': counts,
+            'total': sum(counts.values()),
+            'completed_per_min': recent * 60.0 / window_seconds,
+            'active_workers': len(active),
+            'recent_by_worker': per_worker,
+        }
+
+    def failures(self, run_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        where, params = ("AND run_id = ?", (run_id,)) if run_id else ("", ())
+        rows = self.conn.execute(
+            f"SELECT run_id, username, attempts, error FROM jobs WHERE status = ? {where} "
+            "ORDER BY finished_at DESC LIMIT ?", (FAILED,) + params + (limit,))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_queue(url: str) -> JobQueue:
+    """
+    Open a queue backend from a URL. Supported: sqlite:///path/to/queue.db
+    (or a bare file path). Other backends plug in here.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):])
+    if "://" not in url:
+        return SQLiteJobQueue(url)
+    raise ValueError(f"Unsupported queue backend '{url.split('://', 1)[0]}'. Supported: sqlite")
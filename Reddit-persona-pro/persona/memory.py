@@ -0,0 +1,120 @@
+# reddit-persona-pro/persona/memory.py
+
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Optional
+
+# Per-user memory budget in MB: how far one more user may push a warm worker's
+# memory (models loaded and one user already processed, so inference buffers
+# are allocated and reused). Enforced by the memory test and the benchmark so a
+# worker can process many users back to back.
+#
+# Sized for the largest user the fetcher returns, 1000 posts + 1000 comments,
+# measured with tracemalloc on benchmarks.synthetic_corpus listings: ~11 MB to
+# hold every raw listing item at once, under 1 MB once compacted, ~1.5 MB of
+# transient activity analytics arrays, and a few MB of cleaned items plus the
+# "full" tier's 300 chunks. That is roughly 16 MB of per-user data (a whole
+# run with stubbed models grows RSS by ~20 MB, see test/test_memory.py); the
+# budget leaves about 3x headroom for allocator fragmentation and inference
+# batches larger than any seen before.
+PEAK_MB_PER_USER = 64
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Process peak resident set size in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakMemory:
+    """
+    Context manager measuring the memory cost of one block of work.
+
+    `traced_mb` is the Python heap high-water mark inside the block.
+    `rss_growth_mb` is the highest resident set size seen inside the block
+    (sampled on a background thread) minus the RSS on entry, so it also covers
+    native allocations such as tensors and numpy buffers. Where the current
+    RSS cannot be read it falls back to the rise of the process peak RSS,
+    which only moves when a new process high is reached.
+
+    Args:
+        sample_interval: Seconds between RSS samples.
+    """
+
+    def __init__(self, sample_interval: float = 0.005):
+        self.sample_interval = sample_interval
+        self.traced_mb = 0.0
+        self.rss_growth_mb = None
+        self._rss_before = None
+        self._rss_start = None
+        self._rss_high = None
+        self._traced_before = 0
+        self._was_tracing = False
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and rss > self._rss_high:
+            self._rss_high = rss
+
+    def _sample_until_stopped(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def __enter__(self):
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start()
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        self._traced_before, _ = tracemalloc.get_traced_memory()
+        self._rss_before = peak_rss_mb()
+        self._rss_start = self._rss_high = current_rss_mb()
+        if self._rss_start is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_until_stopped, name="peak-memory", daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        _, peak = tracemalloc.get_traced_memory()
+        self.traced_mb = (peak - self._traced_before) / (1024 * 1024)
+        if not self._was_tracing:
+            tracemalloc.stop()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+            self._sample()
+            self.rss_growth_mb = self._rss_high - self._rss_start
+        else:
+            rss_after = peak_rss_mb()
+            if rss_after is not None and self._rss_before is not None:
+                self.rss_growth_mb = rss_after - self._rss_before
+        return False
+
+    @property
+    def peak_mb(self) -> float:
+        """RSS growth, or the traced heap peak if that is higher (a spike between two RSS samples)"""
+        return max(self.traced_mb, self.rss_growth_mb or 0.0)
+
+    def within(self, budget_mb: float = PEAK_MB_PER_USER) -> bool:
+        return self.peak_mb <= budget_mb
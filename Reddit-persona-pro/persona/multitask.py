@@ -0,0 +1,345 @@
+# reddit-persona-pro/persona/multitask.py
+"""
+Shared-encoder analysis: one tokenization and one encoder forward pass per
+chunk, with entity, sentiment and topic heads all reading from it.
+
+The encoder is the NER model, so its token-classification layer is the
+entity head. Its final hidden states are mean-pooled into one embedding per
+chunk, and logistic-regression sentiment and topic heads are trained on
+those embeddings. They learn from transformer labels in the cascade label
+cache, i.e. they are distilled from the original sentiment and zero-shot
+pipelines. Until heads exist, those two tasks fall back to the original
+pipelines (loaded lazily) and their outputs are cached as training data;
+the heads are fitted on a background thread once enough labels exist, or
+explicitly with:
+
+    python -m persona.multitask --fit
+
+It replaces the whole NLPAnalyzer model stack, so it runs the PyTorch encoder
+only and does not combine with the alternative backends or the cascade.
+"""
+
+import argparse
+import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from persona.cache import atomic_pickle_dump, default_cache_dir
+from persona.cascade import LabelCache
+from persona.inference_backends import MODELS, load_pipeline
+from persona.settings import env_flag
+from persona import topic_index
+from persona.topic_index import TopicPriorIndex
+
+ENV_FLAG = "PERSONA_NLP_MULTITASK"
+HEADS_FILE = "multitask_heads.pkl"
+
+
+class MultiTaskAnalyzer:
+    """
+    Drop-in alternative to NLPAnalyzer backed by a single shared encoder.
+
+    Args:
+        topics: Candidate topics (the zero-shot label set the topic head imitates).
+        model_name: Token-classification checkpoint used as the shared encoder.
+        cache_dir: Where the label cache and fitted heads live.
+        batch_size: Chunks per forward pass.
+        max_length: Token limit per chunk.
+        topic_prior: Use the subreddit topic prior index (see persona.topic_index).
+            Defaults to PERSONA_TOPIC_PRIOR.
+        min_records: Sentiment and topic labels each required before the heads are fitted.
+        auto_fit: Fit the heads in the background once min_records labels are cached.
+    """
+
+    backend = "multitask"
+    cascade = None
+
+    def __init__(self, topics: List[str], model_name: str = MODELS["ner"][1], cache_dir: Optional[str] = None,
+                 batch_size: int = 16, max_length: int = 512, topic_prior: Optional[bool] = None,
+                 min_records: int = 100, auto_fit: bool = True, max_fit_records: int = 2000):
+        self.topics = list(topics)
+        self.model_name = model_name
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.heads_path = os.path.join(self.cache_dir, HEADS_FILE)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.min_records = min_records
+        self.auto_fit = auto_fit
+        self.max_fit_records = max_fit_records
+        self._load_encoder()
+
+        self.labels = LabelCache(self.cache_dir)
+        self.sentiment_head = None
+        self.topic_heads: Dict[str, Any] = {}
+        self._fallback: Dict[str, Any] = {}
+        # The tokenizer is not thread-safe, and background fitting encodes the cached labels
+        self._encoder_lock = threading.Lock()
+        self._fitting: Optional[threading.Thread] = None
+        self._fit_attempted_at = 0
+        self._load_heads()
+        self.topic_index = TopicPriorIndex(self.topics, cache_dir=self.cache_dir) \
+            if env_flag(topic_index.ENV_FLAG, topic_prior) else None
+
+        # Per-chunk results of the latest forward passes, so the three task
+        # methods called on the same chunks share one encoding
+        self._encoded: Dict[str, Tuple[List[Dict[str, Any]], np.ndarray]] = {}
+        self._maybe_fit()
+
+    def _load_encoder(self):
+        import torch
+        from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModelForTokenClassification.from_pretrained(self.model_name).to(self.device).eval()
+        self.id2label = self.model.config.id2label
+
+    # -- heads -----------------------------------------------------------
+
+    def _load_heads(self):
+        if not os.path.exists(self.heads_path):
+            return
+        try:
+            with open(self.heads_path, 'rb') as f:
+                heads = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load multi-task heads: {e}")
+            return
+        if heads.get('model_name') == self.model_name and heads.get('topics') == self.topics:
+            self.sentiment_head = heads.get('sentiment')
+            self.topic_heads = heads.get('topic_heads', {})
+
+    @property
+    def has_heads(self) -> bool:
+        return self.sentiment_head is not None and set(self.topic_heads) == set(self.topics)
+
+    def _maybe_fit(self):
+        # Fit once both tasks can have min_records labels, retrying only after the
+        # cache has grown by a quarter; the fallback pipelines keep serving meanwhile
+        if not self.auto_fit or self.has_heads or self.labels.count < 2 * self.min_records:
+            return
+        if self.labels.count <= self._fit_attempted_at * 1.25:
+            return
+        if self._fitting is not None and self._fitting.is_alive():
+            return
+        self._fit_attempted_at = self.labels.count
+        self._fitting = threading.Thread(target=self._fit_in_background, name="multitask-fit", daemon=True)
+        self._fitting.start()
+
+    def _fit_in_background(self):
+        try:
+            self.fit_heads(self.min_records, verbose=False)
+        except Exception as e:
+            print(f"⚠️ Multi-task head fitting failed: {e}")
+
+    def wait_for_fit(self, timeout: Optional[float] = None) -> None:
+        """Block until a background fit (if any) has finished"""
+        if self._fitting is not None:
+            self._fitting.join(timeout)
+
+    def _record(self, task: str, texts: List[str], results: List) -> None:
+        if self.labels.record(task, texts, results):
+            self._maybe_fit()
+
+    def fit_heads(self, min_records: Optional[int] = None, verbose: bool = True,
+                  max_records: Optional[int] = None) -> bool:
+        """
+        Fit sentiment/topic heads on encoder embeddings of the cached labels.
+
+        Only the latest `max_records` labels per task (default max_fit_records) are
+        encoded, since the label cache is shared with the cascade and can be far larger.
+        """
+        from sklearn.linear_model import LogisticRegression
+
+        min_records = self.min_records if min_records is None else min_records
+        max_records = self.max_fit_records if max_records is None else max_records
+        records = self.labels.load()
+        sentiment = [r for r in records if r['task'] == 'sentiment']
+        topic = [r for r in records if r['task'] == 'topic']
+        if len(sentiment) < min_records or len(topic) < min_records:
+            if verbose:
+                print(f"⚠️ Need {min_records} sentiment and topic labels, have {len(sentiment)} / {len(topic)}")
+            return False
+        sentiment, topic = sentiment[-max_records:], topic[-max_records:]
+
+        X = self._embed([r['text'] for r in sentiment])
+        sentiment_head = LogisticRegression(max_iter=2000).fit(X, [r['label'] for r in sentiment])
+
+        X = self._embed([r['text'] for r in topic])
+        topic_heads: Dict[str, Any] = {}
+        for name in self.topics:
+            y = [int(r['scores'].get(name, 0.0) >= 0.5) for r in topic]
+            if 0 < sum(y) < len(y):
+                topic_heads[name] = LogisticRegression(max_iter=2000, class_weight='balanced').fit(X, y)
+            else:
+                # Single-class labels: a smoothed constant relevance instead of a classifier
+                topic_heads[name] = (sum(y) + 1) / (len(y) + 2)
+
+        atomic_pickle_dump(self.heads_path, {'model_name': self.model_name, 'topics': self.topics,
+                                             'sentiment': sentiment_head, 'topic_heads': topic_heads})
+        # Swapped in together, so a concurrent call never mixes heads and fallbacks
+        self.topic_heads, self.sentiment_head = topic_heads, sentiment_head
+        # The heads replace the fallback pipelines, so release their models
+        self._fallback.clear()
+        return True
+
+    # -- encoder ---------------------------------------------------------
+
+    def _forward(self, texts: List[str]) -> List[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        """Encode texts batch by batch, holding the encoder only for one batch at a time"""
+        out = []
+        for start in range(0, len(texts), self.batch_size):
+            with self._encoder_lock:
+                out.extend(self._forward_batch(texts[start:start + self.batch_size]))
+        return out
+
+    def _forward_batch(self, batch: List[str]) -> List[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        """One tokenization + forward pass: token entities and a pooled embedding per text"""
+        import torch
+
+        out = []
+        with torch.no_grad():
+            enc = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_length,
+                                 return_tensors="pt", return_special_tokens_mask=True)
+            special = enc.pop("special_tokens_mask")
+            enc = enc.to(self.device)
+            result = self.model(**enc, output_hidden_states=True)
+
+            mask = enc["attention_mask"].unsqueeze(-1).float()
+            hidden = result.hidden_states[-1]
+            pooled = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).cpu().numpy()
+
+            probs = torch.softmax(result.logits, dim=-1).cpu()
+            scores, label_ids = probs.max(dim=-1)
+            input_ids = enc["input_ids"].cpu()
+            for row in range(len(batch)):
+                entities = []
+                keep = (enc["attention_mask"][row].cpu().bool()) & (~special[row].bool())
+                for pos in torch.nonzero(keep).flatten().tolist():
+                    label = self.id2label[int(label_ids[row, pos])]
+                    if label == 'O':
+                        continue
+                    entities.append({
+                        'entity': label,
+                        'word': self.tokenizer.convert_ids_to_tokens(int(input_ids[row, pos])),
+                        'score': float(scores[row, pos]),
+                    })
+                out.append((entities, pooled[row]))
+        return out
+
+    def _encode(self, texts: List[str]) -> List[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        missing = list(dict.fromkeys(t for t in texts if t not in self._encoded))
+        if missing:
+            if len(self._encoded) > 4096:
+                self._encoded.clear()
+            self._encoded.update(zip(missing, self._forward(missing)))
+        return [self._encoded[t] for t in texts]
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.stack([emb for _, emb in self._forward(texts)]) if texts else np.zeros((0, 1))
+
+    def _fallback_pipeline(self, kind: str):
+        if kind not in self._fallback:
+            print(f"ℹ️ Multi-task heads not fitted yet; using the {kind} pipeline and caching its labels")
+            self._fallback[kind] = load_pipeline(kind, device=0 if self.device == "cuda" else -1)
+        return self._fallback[kind]
+
+    # -- NLPAnalyzer interface -------------------------------------------
+
+    def extract_entities(self, text: str) -> List[Dict[str, Any]]:
+        try:
+            return self._encode([text])[0][0]
+        except Exception as e:
+            print(f"Error in entity extraction: {e}")
+            return []
+
+    def analyze_sentiments_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        if not texts:
+            return []
+        try:
+            if self.sentiment_head is None:
+                results = self._fallback_pipeline("sentiment")(texts)
+                self._record('sentiment', texts, results)
+                return results
+            X = np.stack([emb for _, emb in self._encode(texts)])
+            probs = self.sentiment_head.predict_proba(X)
+            classes = list(self.sentiment_head.classes_)
+            return [{'label': classes[int(np.argmax(row))], 'score': float(np.max(row))} for row in probs]
+        except Exception as e:
+            print(f"Error in batch sentiment: {e}")
+            return [{'label': 'NEUTRAL', 'score': 0.5} for _ in texts]
+
+    def extract_topics_batch(self, texts: List[str], subreddits: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        if self.topic_index and subreddits:
+            return self.topic_index.apply(texts, subreddits, self._classify_topics)
+        return self._classify_topics(texts)
+
+    def _classify_topics(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        if not texts:
+            return []
+        try:
+            if not self.has_heads:
+                results = self._fallback_pipeline("topic")(texts, self.topics, multi_label=True)
+                if isinstance(results, dict):
+                    results = [results]
+                topics = [[{'topic': label, 'score': score} for label, score in zip(r['labels'], r['scores'])]
+                          for r in results]
+                self._record('topic', texts, topics)
+                return topics
+            X = np.stack([emb for _, emb in self._encode(texts)])
+            per_topic = {name: np.full(len(texts), head) if isinstance(head, float)
+                         else np.asarray(head.predict_proba(X))[:, 1]
+                         for name, head in self.topic_heads.items()}
+            out = []
+            for i in range(len(texts)):
+                ranked = sorted(((name, float(per_topic[name][i])) for name in self.topics),
+                                key=lambda kv: kv[1], reverse=True)
+                out.append([{'topic': name, 'score': score} for name, score in ranked])
+            return out
+        except Exception as e:
+            print(f"Error in topic batch: {e}")
+            return [[] for _ in texts]
+
+    def analyze_batch(self, texts: List[str], subreddits: Optional[List[str]] = None,
+                      checkpoint: Optional[Callable[[], None]] = None):
+        """
+        Sentiments, topics and entities for a batch, encoding each chunk once.
+
+        `checkpoint` is called between the three steps, as in NLPAnalyzer.analyze_batch.
+        """
+        checkpoint = checkpoint or (lambda: None)
+        try:
+            self._encode(texts)
+            checkpoint()
+            sentiments = self.analyze_sentiments_batch(texts)
+            checkpoint()
+            topics = self.extract_topics_batch(texts, subreddits)
+            checkpoint()
+            entities = [self.extract_entities(text) for text in texts]
+        finally:
+            self._encoded.clear()
+        return sentiments, topics, entities
+
+
+def main():
+    from persona.nlp_analyzer import CANDIDATE_TOPICS
+
+    parser = argparse.ArgumentParser(description="Fit the shared-encoder multi-task heads")
+    parser.add_argument("--fit", action="store_true", help="Fit heads from the cached transformer labels")
+    parser.add_argument("--min-records", type=int, default=100)
+    parser.add_argument("--max-records", type=int, default=2000, help="Latest labels per task to fit on")
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+
+    analyzer = MultiTaskAnalyzer(CANDIDATE_TOPICS, cache_dir=args.cache_dir, min_records=args.min_records,
+                                 auto_fit=False, max_fit_records=args.max_records)
+    print(f"📚 {analyzer.labels.count} cached labels in {analyzer.labels.path}")
+    if args.fit and analyzer.fit_heads():
+        print(f"✅ Heads saved to {analyzer.heads_path}")
+
+
+if __name__ == "__main__":
+    main()
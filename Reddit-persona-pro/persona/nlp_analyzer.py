@@ -1,20 +1,49 @@
 # reddit-persona-pro/persona/nlp_analyzer.py
 
-from transformers import pipeline
+import os
 import torch
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
+from persona.inference_backends import load_pipeline, DEFAULT_BACKEND
+from persona import cascade as cascade_module, topic_index
+from persona.cascade import Cascade
+from persona.settings import env_flag
+from persona.topic_index import TopicPriorIndex
+
+CANDIDATE_TOPICS = [
+    "technology", "gaming", "sports", "politics",
+    "entertainment", "science", "education", "business",
+    "travel", "food", "health", "relationships"
+]
 
 
 class NLPAnalyzer:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, cache_dir: Optional[str] = None,
+                 cascade: Optional[bool] = None, cascade_options: Optional[Dict[str, Any]] = None,
+                 topic_prior: Optional[bool] = None):
         """
         Initializes NLP pipelines using HuggingFace transformers.
         Automatically selects GPU if available.
+
+        Args:
+            backend: Inference backend ("pytorch", "quantized", "onnx", "onnx-int8").
+                Defaults to PERSONA_NLP_BACKEND or "pytorch". See persona.inference_backends.
+            cache_dir: Where converted models are cached.
+            cascade: Decide easy chunks with cheap classifiers and only escalate the rest
+                to the transformers. Defaults to PERSONA_NLP_CASCADE. See persona.cascade.
+            cascade_options: Keyword arguments (thresholds, audit rate...) for Cascade.
+            topic_prior: Skip topic classification for chunks from subreddits whose topic
+                distribution is already known. Defaults to PERSONA_TOPIC_PRIOR. See persona.topic_index.
         """
+        self.backend = backend or os.getenv("PERSONA_NLP_BACKEND", DEFAULT_BACKEND)
         device = 0 if torch.cuda.is_available() else -1
-        self.ner_pipeline = pipeline("ner", device=device)
-        self.sentiment_pipeline = pipeline("sentiment-analysis", device=device)
-        self.topic_pipeline = pipeline("zero-shot-classification", device=device)
+        self.ner_pipeline = load_pipeline("ner", self.backend, device, cache_dir)
+        self.sentiment_pipeline = load_pipeline("sentiment", self.backend, device, cache_dir)
+        self.topic_pipeline = load_pipeline("topic", self.backend, device, cache_dir)
+
+        self.cascade = Cascade(CANDIDATE_TOPICS, cache_dir=cache_dir, **(cascade_options or {})) \
+            if env_flag(cascade_module.ENV_FLAG, cascade) else None
+        self.topic_index = TopicPriorIndex(CANDIDATE_TOPICS, cache_dir=cache_dir) \
+            if env_flag(topic_index.ENV_FLAG, topic_prior) else None
 
     def extract_entities(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -26,6 +55,13 @@ class NLPAnalyzer:
         Returns:
             A list of dictionaries containing entities.
         """
+        if self.cascade and not self.cascade.needs_entities(text):
+            if self.cascade.should_audit(text):
+                self.cascade.record_audit('ner', not self._run_ner(text))
+            return []
+        return self._run_ner(text)
+
+    def _run_ner(self, text: str) -> List[Dict[str, Any]]:
         try:
             entities = self.ner_pipeline(text)
             return [{
@@ -47,29 +83,72 @@ class NLPAnalyzer:
         Returns:
             List of sentiment results for each text.
         """
+        if not self.cascade:
+            return self._run_sentiment(texts)
+
+        decisions = self.cascade.sentiment(texts)
+        escalated = [i for i, d in enumerate(decisions) if d is None]
+        # Lexicon "NEUTRAL" has no transformer counterpart, so only polar decisions are audited
+        audited = [i for i, d in enumerate(decisions)
+                   if d is not None and d['label'] != 'NEUTRAL' and self.cascade.should_audit(texts[i])]
+        run = escalated + audited
+        if run:
+            run_texts = [texts[i] for i in run]
+            results = self._run_sentiment(run_texts)
+            self.cascade.record('sentiment', run_texts, results)
+            for i, result in zip(run, results):
+                if decisions[i] is not None:
+                    self.cascade.record_audit('sentiment', decisions[i]['label'] == result['label'])
+                decisions[i] = result
+        return decisions
+
+    def _run_sentiment(self, texts: List[str]) -> List[Dict[str, Any]]:
         try:
             return self.sentiment_pipeline(texts)
         except Exception as e:
             print(f"Error in batch sentiment: {e}")
             return [{'label': 'NEUTRAL', 'score': 0.5} for _ in texts]
 
-    def extract_topics_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+    def extract_topics_batch(self, texts: List[str], subreddits: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
         """
         Extract topics using zero-shot classification for a batch of text inputs.
 
         Args:
             texts: List of text chunks.
+            subreddits: Optional source subreddit per chunk, used by the topic prior index.
 
         Returns:
             List of topic lists per input text.
         """
+        if self.topic_index and subreddits:
+            return self.topic_index.apply(texts, subreddits, self._classify_topics)
+        return self._classify_topics(texts)
+
+    def _classify_topics(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        if not self.cascade:
+            return self._run_topics(texts)
+
+        decisions = self.cascade.topics_for(texts)
+        escalated = [i for i, d in enumerate(decisions) if d is None]
+        audited = [i for i, d in enumerate(decisions) if d is not None and self.cascade.should_audit(texts[i])]
+        run = escalated + audited
+        if run:
+            run_texts = [texts[i] for i in run]
+            results = self._run_topics(run_texts)
+            self.cascade.record('topic', run_texts, results)
+            for i, result in zip(run, results):
+                if decisions[i] is not None:
+                    predicted = {t['topic'] for t in decisions[i] if t['score'] >= 0.5}
+                    actual = {t['topic'] for t in result if t['score'] >= 0.5}
+                    self.cascade.record_audit('topic', predicted == actual)
+                decisions[i] = result
+        return decisions
+
+    def _run_topics(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        if not texts:
+            return []
         try:
-            candidate_topics = [
-                "technology", "gaming", "sports", "politics",
-                "entertainment", "science", "education", "business",
-                "travel", "food", "health", "relationships"
-            ]
-            results = self.topic_pipeline(texts, candidate_topics, multi_label=True)
+            results = self.topic_pipeline(texts, CANDIDATE_TOPICS, multi_label=True)
 
             # Ensure uniform handling
             if isinstance(results, dict):
@@ -83,3 +162,24 @@ class NLPAnalyzer:
         except Exception as e:
             print(f"Error in topic batch: {e}")
             return [[] for _ in texts]
+
+    def analyze_batch(self, texts: List[str], subreddits: Optional[List[str]] = None,
+                      checkpoint: Optional[Callable[[], None]] = None):
+        """
+        Run all three analyses over a batch of chunks.
+
+        Args:
+            texts: List of text chunks.
+            subreddits: Optional source subreddit per chunk.
+            checkpoint: Called between the sentiment, topic and entity steps; may raise to stop early.
+
+        Returns:
+            (sentiments, topics per text, entities per text)
+        """
+        checkpoint = checkpoint or (lambda: None)
+        sentiments = self.analyze_sentiments_batch(texts)
+        checkpoint()
+        topics = self.extract_topics_batch(texts, subreddits)
+        checkpoint()
+        entities = [self.extract_entities(text) for text in texts]
+        return sentiments, topics, entities
@@ -2,6 +2,7 @@ from openai import OpenAI
 import os
 from typing import Dict, List
 from collections import Counter
+from persona.activity import peak_hours
 
 class PersonaEngine:
     def __init__(self, api_key: str = None):
@@ -20,7 +21,7 @@ class PersonaEngine:
         sentiment_scores = [s['score'] for s in sentiments]
         avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.5
 
-        return {
+        persona = {
             'location': Counter(locations).most_common(1)[0][0] if locations else 'Unknown',
             'interests': list(set(interests)),
             'personality': self._derive_personality(avg_sentiment, topics),
@@ -28,6 +29,14 @@ class PersonaEngine:
             'writing_style': self._analyze_writing_style(analyzed_data)
         }
 
+        activity = analyzed_data.get('activity')
+        if activity and activity.get('total'):
+            persona['posting_schedule'] = self._describe_schedule(activity)
+            persona['activity_pattern'] = self._describe_activity_pattern(activity)
+            persona['top_communities'] = ', '.join(
+                f"r/{s['subreddit']} ({s['share']:.0%})" for s in activity['subreddits'][:3])
+        return persona
+
     def add_citations(self, persona: Dict, source_data: List) -> Dict:
         """Add citations to generated persona"""
         cited_persona = {}
@@ -55,6 +64,19 @@ class PersonaEngine:
         return ', '.join(traits) if traits else 'balanced'
 
     def _calculate_activity_level(self, data: Dict) -> str:
+        activity = data.get('activity')
+        if activity and activity.get('total'):
+            # Posting rate over the full fetched history (see persona.activity)
+            rate = activity['items_per_day']
+            if rate >= 10:
+                return 'very active'
+            elif rate >= 2:
+                return 'active'
+            elif rate >= 0.25:
+                return 'moderately active'
+            else:
+                return 'casual'
+
         post_count = len(data.get('posts', []))
         comment_count = len(data.get('comments', []))
         total = post_count + comment_count
@@ -68,6 +90,40 @@ class PersonaEngine:
         else:
             return 'casual'
 
+    def _describe_schedule(self, activity: Dict) -> str:
+        start = peak_hours(activity['by_hour'])
+        by_weekday = activity['by_weekday']
+        weekend_share = (by_weekday['Sat'] + by_weekday['Sun']) / max(activity['total'], 1)
+        if weekend_share > 0.4:
+            days = 'mostly on weekends'
+        elif weekend_share < 0.15:
+            days = 'mostly on weekdays'
+        else:
+            days = 'throughout the week'
+        return f"most active {start:02d}:00-{(start + 4) % 24:02d}:00 UTC, {days}"
+
+    def _describe_activity_pattern(self, activity: Dict) -> str:
+        traits = []
+        if activity['burstiness'] > 0.3:
+            traits.append('bursty (posts in sessions)')
+        elif activity['burstiness'] < -0.1:
+            traits.append('regular')
+        else:
+            traits.append('steady')
+
+        rate = activity['items_per_day']
+        recent = activity['recent_items_per_day']
+        if rate and recent > 1.5 * rate:
+            traits.append('increasingly active')
+        elif recent < 0.5 * rate:
+            traits.append('less active lately')
+
+        if activity['subreddit_diversity'] < 0.3:
+            traits.append('focused on few communities')
+        elif activity['subreddit_diversity'] > 0.7:
+            traits.append('spread across many communities')
+        return ', '.join(traits)
+
     def _analyze_writing_style(self, data: Dict) -> str:
         styles = []
         all_text = ' '.join(data.get('texts', []))
@@ -84,12 +140,12 @@ class PersonaEngine:
     def _find_supporting_content(self, key: str, value: any, source_data: List) -> List[Dict]:
         citations = []
         for item in source_data:
-            if isinstance(value, str) and value.lower() in item['text'].lower():
+            if isinstance(value, str) and value.lower() in item.text.lower():
                 citations.append({
-                    'text': item['text'][:100] + '...',
-                    'type': item['type'],
-                    'subreddit': item['subreddit'],
-                    'link': f"https://reddit.com/{item['id']}"
+                    'text': item.text[:100] + '...',
+                    'type': item.type,
+                    'subreddit': item.subreddit,
+                    'link': f"https://reddit.com/{item.id}"
                 })
             if len(citations) >= 3:
                 break
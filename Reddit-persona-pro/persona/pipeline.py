@@ -0,0 +1,285 @@
+# reddit-persona-pro/persona/pipeline.py
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+from typing import Callable, Dict, Optional, Tuple
+
+from persona.reddit_fetcher import RedditFetcher
+from persona.content_preprocessor import ContentPreprocessor
+from persona.nlp_analyzer import NLPAnalyzer, CANDIDATE_TOPICS
+from persona import cascade as cascade_module, multitask as multitask_module, similarity
+from persona.multitask import MultiTaskAnalyzer
+from persona.persona_engine import PersonaEngine
+from persona.visual_renderer import PersonaVisualizer
+from persona.sampler import ContentSampler
+from persona.activity import analyze_activity
+from persona.similarity import PersonaIndex, feature_dim, persona_features
+from persona.settings import env_flag
+
+DEFAULT_TIER = "standard"  # Inference budget, see persona.sampler.SAMPLING_TIERS
+
+DEFAULT_AVATAR = "https://www.redditstatic.com/avatars/defaults/v2/avatar_default_5.png"
+
+# Ordered stage names reported through the progress callback
+STAGES = ["fetch", "activity", "preprocess", "analyze", "persona", "render"]
+
+ProgressCallback = Callable[[str, str, int, int], None]
+
+# Chunks analyzed between cancellation checkpoints
+ANALYZE_BATCH_SIZE = 32
+
+
+class JobCancelled(Exception):
+    """Raised on the worker thread when a cancelled job reaches a checkpoint"""
+
+
+class PersonaPipeline:
+    """
+    Long-lived persona pipeline.
+
+    Components (and in particular the transformer models) are created once and
+    reused across runs, so only the first run pays the model loading cost.
+    Blocking work runs on a single dedicated thread, which keeps the event loop
+    responsive and lets a running job be cancelled. A blocking stage cannot be
+    interrupted, so cancelling waits for it to reach its next checkpoint (or
+    return) before the job's task ends, and the next job never queues behind
+    abandoned work.
+    """
+
+    def __init__(self, output_dir: str = "output", tier: str = DEFAULT_TIER, fetcher: Optional[RedditFetcher] = None,
+                 backend: Optional[str] = None, cascade: Optional[bool] = None, multitask: Optional[bool] = None,
+                 topic_prior: Optional[bool] = None, similarity_index: Optional[bool] = None,
+                 cache_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        self.backend = backend
+        # cascade and topic_prior stay None unless given; the analyzers resolve them from the environment
+        self.cascade = cascade
+        self.topic_prior = topic_prior
+        self.cache_dir = cache_dir
+        self.multitask = env_flag(multitask_module.ENV_FLAG, multitask)
+        if self.multitask:
+            # The shared-encoder analyzer replaces the backend pipelines and the cascade
+            if (backend and backend != "pytorch") or cascade:
+                raise ValueError("--multitask runs its own PyTorch encoder and cannot be combined "
+                                 "with --backend or --cascade")
+            if os.getenv("PERSONA_NLP_BACKEND", "pytorch") != "pytorch" or env_flag(cascade_module.ENV_FLAG):
+                print("⚠️ PERSONA_NLP_BACKEND / PERSONA_NLP_CASCADE are ignored by the multi-task analyzer")
+        self.index = PersonaIndex(dim=feature_dim(CANDIDATE_TOPICS)) \
+            if env_flag(similarity.ENV_FLAG, similarity_index) else None
+        self.sampler = ContentSampler.for_tier(tier)
+        self.fetcher = fetcher or RedditFetcher(
+            client_id=os.getenv('REDDIT_CLIENT_ID'),
+            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+            user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaBot/1.0')
+        )
+        self.preprocessor = None
+        self.analyzer = None
+        self.engine = None
+        self.visualizer = None
+        # Wall-clock seconds per stage for the most recent run
+        self.last_timings: Dict[str, float] = {}
+        # Similarity feature vector of the most recent run (see persona.similarity)
+        self.last_features = None
+        # Activity analytics of the most recent run (see persona.activity)
+        self.last_activity: Optional[Dict] = None
+        # HF pipelines are not thread-safe, so all blocking work shares one thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persona-worker")
+        # Checked by blocking work between sub-steps; set when the running job is cancelled
+        self._cancel_requested = threading.Event()
+
+    @property
+    def is_warm(self) -> bool:
+        return self.analyzer is not None
+
+    def _load_components(self):
+        """Create the heavy components once (blocking)"""
+        if self.preprocessor is None:
+            self.preprocessor = ContentPreprocessor()
+        if self.analyzer is None:
+            if self.multitask:
+                self.analyzer = MultiTaskAnalyzer(CANDIDATE_TOPICS, cache_dir=self.cache_dir,
+                                                  topic_prior=self.topic_prior)
+            else:
+                self.analyzer = NLPAnalyzer(backend=self.backend, cache_dir=self.cache_dir, cascade=self.cascade,
+                                            topic_prior=self.topic_prior)
+        if self.engine is None:
+            self.engine = PersonaEngine()
+
+    def cancel(self):
+        """Ask the blocking work of the running job to stop at its next checkpoint (thread-safe)"""
+        self._cancel_requested.set()
+
+    def _checkpoint(self):
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+
+    def _checked(self, func, *args):
+        self._checkpoint()
+        return func(*args)
+
+    async def _run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._checked, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted: stop it at its next checkpoint and only
+            # finish cancelling once it is free again
+            self.cancel()
+            await asyncio.wait([future])
+            if not future.cancelled():
+                future.exception()  # retrieved, so it is not logged as unhandled
+            raise
+        except JobCancelled:
+            raise asyncio.CancelledError()
+
+    @contextmanager
+    def _stage(self, username: str, stage: str, progress: Optional[ProgressCallback]):
+        if progress:
+            progress(username, stage, STAGES.index(stage) + 1, len(STAGES))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.last_timings[stage] = time.perf_counter() - start
+
+    async def warm_up(self):
+        """Load models ahead of the first job"""
+        await self._run_blocking(self._load_components)
+
+    def _analyze(self, cleaned_posts, cleaned_comments, activity: Optional[Dict] = None) -> Dict:
+        # Only a budgeted, representative subset of chunks goes through the models;
+        # the full item lists are still used for citations
+        selected, all_chunks = self.sampler.sample(cleaned_posts, cleaned_comments)
+        subreddits = [item.subreddit for item in selected for _ in self.sampler.chunks_for(item)]
+
+        # Mini-batches, with checkpoints between batches and between the steps of each,
+        # so a cancel does not wait for the whole analysis
+        sentiments, topics, entities = [], [], []
+        for start in range(0, len(all_chunks), ANALYZE_BATCH_SIZE):
+            self._checkpoint()
+            end = start + ANALYZE_BATCH_SIZE
+            batch_sentiments, batch_topics, batch_entities = self.analyzer.analyze_batch(
+                all_chunks[start:end], subreddits[start:end], checkpoint=self._checkpoint)
+            sentiments.extend(batch_sentiments)
+            topics.extend(chain.from_iterable(batch_topics))
+            entities.extend(chain.from_iterable(batch_entities))
+
+        return {
+            'entities': entities,
+            'sentiments': sentiments,
+            'topics': topics,
+            'posts': cleaned_posts,
+            'comments': cleaned_comments,
+            'texts': all_chunks,
+            'activity': activity
+        }
+
+    def _build_persona(self, metadata: Dict):
+        structured = self.engine.generate_persona(metadata)
+        self._checkpoint()
+        cited = self.engine.add_citations(structured, metadata['posts'] + metadata['comments'])
+        self._checkpoint()
+        summary = self.engine.generate_natural_summary(structured)
+        self.last_features = persona_features(metadata, CANDIDATE_TOPICS)
+        return cited, summary
+
+    async def _fetch_with_activity(self, username: str, progress: Optional[ProgressCallback]):
+        self.last_timings = {}
+        with self._stage(username, "fetch", progress):
+            posts, comments = await self.fetcher.fetch_user_content(username)
+        # Runs on the complete listings, before preprocessing filters and caps them
+        with self._stage(username, "activity", progress):
+            self.last_activity = analyze_activity(posts, comments)
+        return posts, comments
+
+    async def profile_activity(self, username: str, progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Fetch a user and compute activity analytics only (no models are loaded).
+
+        Returns:
+            The persona.activity.analyze_activity result.
+        """
+        self._cancel_requested.clear()
+        await self._fetch_with_activity(username, progress)
+        return self.last_activity
+
+    async def build(self, username: str, progress: Optional[ProgressCallback] = None) -> Optional[Tuple[Dict, str]]:
+        """
+        Fetch, analyze and summarize a single user.
+
+        Args:
+            username: Reddit username (without the u/ prefix).
+            progress: Optional callback receiving (username, stage, step, total).
+
+        Returns:
+            (cited persona, summary), or None if the user has no public content.
+        """
+        self.last_features = None
+        self._cancel_requested.clear()
+        await self.warm_up()
+
+        posts, comments = await self._fetch_with_activity(username, progress)
+        if not posts and not comments:
+            return None
+
+        with self._stage(username, "preprocess", progress):
+            cleaned_posts, cleaned_comments = await self._run_blocking(
+                self.preprocessor.clean_and_chunk, posts, comments, None
+            )
+            del posts, comments
+
+        with self._stage(username, "analyze", progress):
+            metadata = await self._run_blocking(self._analyze, cleaned_posts, cleaned_comments, self.last_activity)
+
+        with self._stage(username, "persona", progress):
+            built = await self._run_blocking(self._build_persona, metadata)
+            if self.index is not None:
+                await self._run_blocking(self.index.add, username, self.last_features)
+            return built
+
+    async def run(self, username: str, progress: Optional[ProgressCallback] = None) -> Optional[str]:
+        """
+        Generate a persona PDF for a single user.
+
+        Returns:
+            Path of the generated PDF, or None if the user has no public content.
+        """
+        built = await self.build(username, progress)
+        if built is None:
+            return None
+        cited, summary = built
+        return await self.render(username, cited, summary, progress)
+
+    async def render(self, username: str, cited: Dict, summary: str,
+                     progress: Optional[ProgressCallback] = None) -> str:
+        """
+        Render a built persona to <output_dir>/<username>_persona.pdf.
+
+        The PDF is written under a temporary name and moved into place, so a
+        re-run (or a retried distributed job) replaces it atomically.
+        """
+        with self._stage(username, "render", progress):
+            if self.visualizer is None:
+                self.visualizer = PersonaVisualizer(output_dir=self.output_dir)
+            avatar_url = await self.fetcher.fetch_user_avatar(username)
+            filename = f"{username}_persona.pdf"
+            tmp_filename = f".{filename}.{os.getpid()}.tmp"
+            await self._run_blocking(
+                lambda: self.visualizer.render_to_pdf(
+                    persona=cited,
+                    summary=summary,
+                    image_url=avatar_url or DEFAULT_AVATAR,
+                    output_filename=tmp_filename
+                )
+            )
+            os.replace(os.path.join(self.output_dir, tmp_filename), os.path.join(self.output_dir, filename))
+        return os.path.join(self.output_dir, filename)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,37 @@
+# reddit-persona-pro/persona/records.py
+
+from typing import Dict, Tuple
+
+# Raw listing fields the pipeline actually reads; everything else Reddit
+# returns (~100 keys per item) is dropped as soon as a page is parsed.
+LISTING_FIELDS = ('body', 'selftext', 'subreddit', 'created_utc', 'score')
+
+
+def compact_listing_item(data: Dict) -> Dict:
+    """Keep only the listing fields used downstream"""
+    return {key: data[key] for key in LISTING_FIELDS if key in data}
+
+
+class ContentItem:
+    """
+    A cleaned post or comment.
+
+    Slotted so that the hundreds of items kept per user carry no per-instance
+    __dict__. `chunks` is a tuple of strings; single-chunk items share the
+    `text` object instead of holding a copy.
+    """
+
+    __slots__ = ('id', 'text', 'type', 'subreddit', 'created_utc', 'score', 'chunks')
+
+    def __init__(self, id: str, text: str, type: str, subreddit: str = '',
+                 created_utc: float = 0.0, score: int = 0, chunks: Tuple[str, ...] = ()):
+        self.id = id
+        self.text = text
+        self.type = type
+        self.subreddit = subreddit
+        self.created_utc = created_utc
+        self.score = score
+        self.chunks = chunks
+
+    def __repr__(self) -> str:
+        return f"ContentItem(type={self.type!r}, subreddit={self.subreddit!r}, chunks={len(self.chunks)})"
@@ -2,13 +2,17 @@ import aiohttp
 import asyncio
 import base64
 from typing import Tuple, List, Dict, Optional
+from persona.records import compact_listing_item
 
 class RedditFetcher:
-    def __init__(self, client_id: str, client_secret: str, user_agent: str):
+    def __init__(self, client_id: str, client_secret: str, user_agent: str,
+                 base_url: str = 'https://oauth.reddit.com',
+                 auth_url: str = 'https://www.reddit.com/api/v1/access_token'):
         self.client_id = client_id
         self.client_secret = client_secret
         self.user_agent = user_agent
-        self.base_url = 'https://oauth.reddit.com'
+        self.base_url = base_url
+        self.auth_url = auth_url
         self.token = None
 
     async def _get_token(self, session: aiohttp.ClientSession) -> str:
@@ -23,7 +27,7 @@ class RedditFetcher:
         data = {'grant_type': 'client_credentials'}
 
         async with session.post(
-            'https://www.reddit.com/api/v1/access_token',
+            self.auth_url,
             headers=headers,
             data=data
         ) as response:
@@ -33,7 +37,7 @@ class RedditFetcher:
             return result['access_token']
 
     async def _fetch_data(self, session: aiohttp.ClientSession, endpoint: str) -> List[Dict]:
-        """Fetch data from Reddit API with pagination"""
+        """Fetch data from Reddit API with pagination, keeping only the fields we use"""
         if not self.token:
             self.token = await self._get_token(session)
 
@@ -43,6 +47,7 @@ class RedditFetcher:
         }
         items = []
         after = None
+        refreshed = False
 
         while True:
             params = {'limit': 100}
@@ -54,12 +59,18 @@ class RedditFetcher:
                 headers=headers,
                 params=params
             ) as response:
+                if response.status == 401 and not refreshed:
+                    # Cached token expired (long-lived fetchers outlive the 1h token)
+                    refreshed = True
+                    self.token = await self._get_token(session)
+                    headers['Authorization'] = f'Bearer {self.token}'
+                    continue
                 if response.status != 200:
                     raise Exception(f"Failed to fetch data: {await response.text()}")
 
                 data = await response.json()
                 children = data['data']['children']
-                items.extend([child['data'] for child in children])
+                items.extend(compact_listing_item(child['data']) for child in children)
 
                 after = data['data'].get('after')
                 if not after or len(items) >= 1000:  # Limit to 1000 items
@@ -0,0 +1,168 @@
+# reddit-persona-pro/persona/sampler.py
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from persona.records import ContentItem
+
+# Inference budgets per tier. max_tokens=None means only the chunk budget applies.
+SAMPLING_TIERS = {
+    "lite": {"max_chunks": 60, "max_tokens": 12000},
+    "standard": {"max_chunks": 150, "max_tokens": 40000},
+    "full": {"max_chunks": 300, "max_tokens": None},
+}
+
+# Character length boundaries for the short / medium / long / very long strata
+LENGTH_BUCKETS = (80, 300, 1000)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough subword token count (~4 characters per token for English)"""
+    return max(1, len(text) // 4)
+
+
+class ContentSampler:
+    """
+    Budgeted, coverage-driven selection of items for NLP inference.
+
+    Each item covers a few strata: its subreddit, a time bucket over the
+    user's history, a length bucket and its type. Items are picked greedily by
+    marginal coverage per chunk of cost, with diminishing returns for strata
+    that are already represented, so a user's typical behaviour across
+    communities and time wins over a handful of high-score outliers.
+    Selection stops at the chunk/token budget or once the best remaining
+    item adds less than `min_gain` of the per-chunk coverage a fresh item would.
+    """
+
+    def __init__(self, max_chunks: int = 150, max_tokens: Optional[int] = None,
+                 max_chunks_per_item: int = 4, time_buckets: int = 8, min_gain: float = 0.1):
+        self.max_chunks = max_chunks
+        self.max_tokens = max_tokens
+        self.max_chunks_per_item = max_chunks_per_item
+        self.time_buckets = time_buckets
+        self.min_gain = min_gain
+        self.last_stats: Dict = {}
+
+    @classmethod
+    def for_tier(cls, tier: str, **overrides) -> "ContentSampler":
+        if tier not in SAMPLING_TIERS:
+            raise ValueError(f"Unknown sampling tier '{tier}'. Choose from: {', '.join(SAMPLING_TIERS)}")
+        return cls(**{**SAMPLING_TIERS[tier], **overrides})
+
+    @staticmethod
+    def _dedup_key(text: str) -> str:
+        return re.sub(r'\W+', '', text.lower())[:200]
+
+    def _features(self, item: ContentItem, t_min: float, t_span: float) -> Tuple:
+        length = len(item.text)
+        length_bucket = sum(length >= bound for bound in LENGTH_BUCKETS)
+        try:
+            t = float(item.created_utc)
+            time_bucket = min(int((t - t_min) / t_span * self.time_buckets), self.time_buckets - 1)
+        except (TypeError, ValueError):
+            time_bucket = -1
+        return (
+            ('sub', item.subreddit),
+            ('time', time_bucket),
+            ('len', length_bucket),
+            ('type', item.type),
+        )
+
+    def chunks_for(self, item: ContentItem) -> Tuple[str, ...]:
+        """The chunks of a selected item that are sent to inference"""
+        return item.chunks[:self.max_chunks_per_item]
+
+    def select(self, items: List[ContentItem]) -> List[ContentItem]:
+        """Pick a representative, de-duplicated subset of items within the budget"""
+        seen = set()
+        candidates = []
+        for item in items:
+            if not item.chunks:
+                continue
+            key = self._dedup_key(item.text)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            candidates.append(item)
+
+        if not candidates:
+            self.last_stats = {'candidates': 0, 'selected': 0, 'chunks': 0, 'tokens': 0, 'strata_covered': 0}
+            return []
+
+        times = []
+        for item in candidates:
+            try:
+                times.append(float(item.created_utc))
+            except (TypeError, ValueError):
+                pass
+        t_min = min(times) if times else 0.0
+        t_span = (max(times) - t_min) if times else 0.0
+        t_span = t_span or 1.0
+
+        log_scores = sorted(math.log1p(max(item.score or 0, 0)) for item in candidates)
+        median_log_score = log_scores[len(log_scores) // 2]
+
+        features = [self._features(item, t_min, t_span) for item in candidates]
+        costs = [len(self.chunks_for(item)) for item in candidates]
+        fresh_gain = float(len(features[0]))
+        counts = Counter()
+
+        def gain(i: int) -> float:
+            return sum(1.0 / (1 + counts[f]) for f in features[i]) / costs[i]
+
+        def typicality(i: int) -> float:
+            # Tie-breaker: prefer items whose score is close to the user's median
+            return abs(math.log1p(max(candidates[i].score or 0, 0)) - median_log_score)
+
+        # Lazy greedy: gains only shrink as coverage grows, so a stale heap
+        # entry is an upper bound and needs re-evaluating only when it surfaces
+        heap = [(-gain(i), typicality(i), i) for i in range(len(candidates))]
+        heapq.heapify(heap)
+
+        selected = []
+        used_chunks = 0
+        used_tokens = 0
+        while heap:
+            _, tie, i = heapq.heappop(heap)
+            current = gain(i)
+            if heap and current < -heap[0][0]:
+                heapq.heappush(heap, (-current, tie, i))
+                continue
+            if current < self.min_gain * fresh_gain:
+                break
+
+            chunk_tokens = sum(estimate_tokens(c) for c in self.chunks_for(candidates[i]))
+            if used_chunks + costs[i] > self.max_chunks:
+                continue
+            if self.max_tokens is not None and used_tokens + chunk_tokens > self.max_tokens:
+                continue
+
+            selected.append(candidates[i])
+            used_chunks += costs[i]
+            used_tokens += chunk_tokens
+            counts.update(features[i])
+            if used_chunks >= self.max_chunks:
+                break
+
+        self.last_stats = {
+            'candidates': len(candidates),
+            'selected': len(selected),
+            'chunks': used_chunks,
+            'tokens': used_tokens,
+            'strata_covered': len(counts),
+        }
+        return selected
+
+    def sample(self, posts: List[ContentItem], comments: List[ContentItem]) -> Tuple[List[ContentItem], List[str]]:
+        """
+        Select items from a user's posts and comments.
+
+        Returns:
+            The selected items and the chunk texts to send to inference.
+        """
+        selected = self.select(list(posts) + list(comments))
+        chunks = [chunk for item in selected for chunk in self.chunks_for(item)]
+        return selected, chunks
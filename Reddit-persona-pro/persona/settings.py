@@ -0,0 +1,11 @@
+# reddit-persona-pro/persona/settings.py
+
+import os
+from typing import Optional
+
+
+def env_flag(name: str, value: Optional[bool] = None) -> bool:
+    """An explicit on/off value if given, otherwise whether environment variable `name` is 1/true/yes"""
+    if value is not None:
+        return value
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes")
@@ -0,0 +1,377 @@
+# reddit-persona-pro/persona/similarity.py
+"""
+Similar-persona search.
+
+Every analyzed user is reduced to one compact feature vector (topic score
+means, sentiment histogram, subreddit distribution, style stats) and stored
+in an on-disk index that answers "which users look like this one" without
+re-running any analysis.
+
+    python -m persona.similarity query spez -k 10
+    python -m persona.similarity add output/distributed/*_persona.json
+    python -m persona.similarity train
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from persona.cache import default_cache_dir
+
+ENV_FLAG = "PERSONA_SIMILARITY_INDEX"
+INDEX_DIR = "persona_index"
+# Bumped when the vector layout changes; indexes built with another version must be rebuilt
+FEATURE_VERSION = 2
+
+SENTIMENT_BINS = np.linspace(-1.0, 1.0, 6)  # 5 bins over the signed sentiment score
+SUBREDDIT_BUCKETS = 64                      # subreddits are feature-hashed into this many buckets
+# Computed from the cleaned chunks, so nothing that preprocessing strips (e.g. URLs) can appear here
+STYLE_FEATURES = ('words_per_chunk', 'words_per_sentence', 'exclamation_rate',
+                  'question_rate', 'comment_share')
+BLOCK_WEIGHTS = {'topics': 1.0, 'sentiment': 0.75, 'subreddits': 1.0, 'style': 0.5}
+
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+
+def feature_dim(topics: Sequence[str]) -> int:
+    return len(topics) + len(SENTIMENT_BINS) - 1 + SUBREDDIT_BUCKETS + len(STYLE_FEATURES)
+
+
+def _unit(block: np.ndarray, weight: float) -> np.ndarray:
+    norm = np.linalg.norm(block)
+    return block * (weight / norm) if norm > 0 else block
+
+
+def persona_features(metadata: Dict, topics: Sequence[str]) -> np.ndarray:
+    """
+    Feature vector for one analyzed user.
+
+    Args:
+        metadata: The analysis result PersonaEngine.generate_persona consumes
+            (texts, topics, sentiments, posts, comments).
+        topics: Candidate topic labels, fixing the order of the topic block.
+
+    Returns:
+        A unit-length float32 vector of length feature_dim(topics). Each block
+        is normalized and weighted first, so the dot product of two vectors is
+        a weighted cosine similarity.
+    """
+    texts = metadata.get('texts', [])
+    n_chunks = max(len(texts), 1)
+
+    position = {t: i for i, t in enumerate(topics)}
+    topic_block = np.zeros(len(topics), dtype=np.float32)
+    for t in metadata.get('topics', []):
+        i = position.get(t['topic'])
+        if i is not None:
+            topic_block[i] += t['score']
+    topic_block /= n_chunks
+
+    signed = [s['score'] if s['label'] == 'POSITIVE' else -s['score'] if s['label'] == 'NEGATIVE' else 0.0
+              for s in metadata.get('sentiments', [])]
+    sentiment_block, _ = np.histogram(signed, bins=SENTIMENT_BINS)
+    sentiment_block = sentiment_block.astype(np.float32) / max(len(signed), 1)
+
+    posts = metadata.get('posts', [])
+    comments = metadata.get('comments', [])
+    subreddit_block = np.zeros(SUBREDDIT_BUCKETS, dtype=np.float32)
+    for item in posts + comments:
+        if item.subreddit:
+            subreddit_block[zlib.crc32(item.subreddit.lower().encode('utf-8')) % SUBREDDIT_BUCKETS] += 1
+
+    words = sum(len(t.split()) for t in texts)
+    sentences = sum(max(len(_SENTENCE_END.findall(t)), 1) for t in texts)
+    style_block = np.array([
+        np.log1p(words / n_chunks) / np.log1p(500),
+        min(words / max(sentences, 1) / 40.0, 1.0),
+        sum('!' in t for t in texts) / n_chunks,
+        sum('?' in t for t in texts) / n_chunks,
+        len(comments) / max(len(posts) + len(comments), 1),
+    ], dtype=np.float32)
+
+    vector = np.concatenate([
+        _unit(topic_block, BLOCK_WEIGHTS['topics']),
+        _unit(sentiment_block, BLOCK_WEIGHTS['sentiment']),
+        _unit(subreddit_block, BLOCK_WEIGHTS['subreddits']),
+        _unit(style_block, BLOCK_WEIGHTS['style']),
+    ]).astype(np.float32)
+    return _unit(vector, 1.0)
+
+
+class PersonaIndex:
+    """
+    On-disk approximate nearest-neighbour index over persona vectors.
+
+    Vectors live in a memory-mapped float32 file that grows by doubling, so
+    inserts are appends (re-inserting a username overwrites its row in
+    place). Once `train_min` vectors exist, spherical k-means centroids are
+    trained and every row is tagged with its nearest centroid (an IVF
+    index); a query scores only the rows of the `nprobe` closest centroids.
+    Below that size queries are exact. Centroids are retrained whenever the
+    index has grown 4x since the last training.
+
+    The index is single-writer: insert from one process (distributed workers
+    store vectors in their persona JSON, which `add` ingests).
+
+    Args:
+        path: Index directory (default: <cache dir>/persona_index).
+        dim: Vector length; required when creating a new index.
+        nprobe: Centroid lists scanned per query.
+        train_min: Index size at which centroids are first trained.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: Optional[int] = None, nprobe: int = 8,
+                 train_min: int = 4096):
+        self.path = path or os.path.join(default_cache_dir(), INDEX_DIR)
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._lists_path = os.path.join(self.path, "lists.i32")
+        self._ids_path = os.path.join(self.path, "ids.txt")
+        self._centroids_path = os.path.join(self.path, "centroids.npy")
+
+        meta = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        if meta:
+            if meta.get('feature_version', FEATURE_VERSION) != FEATURE_VERSION:
+                raise ValueError(f"Index at {self.path} holds feature version {meta['feature_version']} vectors "
+                                 f"(current: {FEATURE_VERSION}); delete it and re-add the personas")
+            if dim is not None and dim != meta['dim']:
+                raise ValueError(f"Index at {self.path} holds {meta['dim']}-d vectors, not {dim}-d")
+            dim = meta['dim']
+        elif dim is None:
+            raise ValueError(f"No persona index at {self.path}; pass dim to create one")
+
+        os.makedirs(self.path, exist_ok=True)
+        self.dim = dim
+        self.trained_at = meta.get('trained_at', 0)
+
+        self.ids: List[str] = []
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, encoding='utf-8') as f:
+                self.ids = [line.rstrip('\n') for line in f]
+        if len(self.ids) > meta.get('count', 0):
+            # Rows past the last saved count belong to an interrupted insert
+            self.ids = self.ids[:meta.get('count', 0)]
+            with open(self._ids_path, 'w', encoding='utf-8') as f:
+                f.writelines(u + '\n' for u in self.ids)
+        self._rows: Dict[str, int] = {u: i for i, u in enumerate(self.ids)}
+
+        self.vectors = self._open(self._vectors_path, np.float32, (self.dim,))
+        self.lists = self._open(self._lists_path, np.int32, ())
+        self.centroids = np.load(self._centroids_path) if os.path.exists(self._centroids_path) else None
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._rows
+
+    # -- storage ---------------------------------------------------------
+
+    @staticmethod
+    def _open(path: str, dtype, row_shape: tuple, capacity: int = 0) -> np.memmap:
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=np.int64))
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if capacity * row_bytes > size or size == 0:
+            with open(path, 'ab') as f:
+                f.truncate(max(capacity, 1024) * row_bytes)
+            size = os.path.getsize(path)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=(size // row_bytes,) + row_shape)
+
+    def _reserve(self, rows: int):
+        if rows <= len(self.vectors):
+            return
+        capacity = max(rows, 2 * len(self.vectors))
+        self.vectors.flush()
+        self.lists.flush()
+        # Drop the old maps before the files grow (required on Windows)
+        self.vectors = self.lists = None
+        self.vectors = self._open(self._vectors_path, np.float32, (self.dim,), capacity)
+        self.lists = self._open(self._lists_path, np.int32, (), capacity)
+
+    def _save_meta(self):
+        self.vectors.flush()
+        self.lists.flush()
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'count': self.count, 'trained_at': self.trained_at,
+                       'feature_version': FEATURE_VERSION}, f)
+        os.replace(tmp, self._meta_path)
+
+    # -- inserts ---------------------------------------------------------
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self.centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> int:
+        """Insert or overwrite (username, vector) pairs; returns how many were new"""
+        added = 0
+        new_ids = []
+        for username, vector in items:
+            vector = np.asarray(vector, dtype=np.float32)
+            if vector.shape != (self.dim,):
+                raise ValueError(f"Expected a {self.dim}-d vector for u/{username}, got {vector.shape}")
+            row = self._rows.get(username)
+            if row is None:
+                row = self.count
+                self._reserve(row + 1)
+                self.ids.append(username)
+                self._rows[username] = row
+                new_ids.append(username)
+                added += 1
+            self.vectors[row] = vector
+            self.lists[row] = self._assign(vector[None, :])[0]
+
+        if new_ids:
+            with open(self._ids_path, 'a', encoding='utf-8') as f:
+                f.writelines(u + '\n' for u in new_ids)
+        if self.count >= self.train_min and self.count >= 4 * self.trained_at:
+            self.train()
+        self._save_meta()
+        return added
+
+    def add(self, username: str, vector: np.ndarray) -> bool:
+        return self.add_many([(username, vector)]) == 1
+
+    def train(self, iterations: int = 10, sample_size: int = 50000, seed: int = 0):
+        """(Re)train the coarse centroids with spherical k-means and re-tag every row"""
+        n = self.count
+        if n == 0:
+            return
+        nlist = int(min(max(np.sqrt(n), 1), 4096))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(self.vectors[rng.choice(n, size=min(n, sample_size), replace=False)])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        for start in range(0, n, 65536):
+            stop = min(start + 65536, n)
+            self.lists[start:stop] = self._assign(np.asarray(self.vectors[start:stop]))
+        np.save(self._centroids_path, self.centroids)
+        self.trained_at = n
+        self._save_meta()
+
+    # -- queries ---------------------------------------------------------
+
+    def query(self, vector: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k most similar stored users.
+
+        Args:
+            vector: Query vector (see persona_features).
+            k: Number of results.
+            nprobe: Centroid lists to scan (default: self.nprobe); ignored below train_min.
+            exclude: Username to leave out (typically the query user).
+
+        Returns:
+            (username, cosine similarity) pairs, most similar first.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.centroids is None:
+            rows = np.arange(n)
+        else:
+            nprobe = min(nprobe or self.nprobe, len(self.centroids))
+            probe = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+            lists = self.lists[:n]
+            rows = np.flatnonzero(np.isin(lists, probe) | (lists < 0))
+        if exclude in self._rows:
+            rows = rows[rows != self._rows[exclude]]
+        if len(rows) == 0:
+            return []
+
+        scores = self.vectors[rows] @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def vector(self, username: str) -> Optional[np.ndarray]:
+        row = self._rows.get(username)
+        return None if row is None else np.array(self.vectors[row])
+
+    def similar_to(self, username: str, k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        vector = self.vector(username)
+        if vector is None:
+            raise KeyError(f"u/{username} is not in the persona index")
+        return self.query(vector, k, nprobe, exclude=username)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar-persona search")
+    parser.add_argument("--index", default=None, help=f"Index directory (default: <cache dir>/{INDEX_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="Users most similar to a stored user")
+    query.add_argument("username")
+    query.add_argument("-k", type=int, default=10)
+    query.add_argument("--nprobe", type=int, default=None)
+
+    add = commands.add_parser("add", help="Ingest persona JSON files written by distributed workers")
+    add.add_argument("files", nargs="+")
+
+    commands.add_parser("train", help="Retrain the coarse centroids")
+    commands.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        items = []
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('features') is None:
+                print(f"⚠️ {path} has no feature vector; skipped")
+                continue
+            items.append((data['username'], data['features']))
+        if not items:
+            return
+        index = PersonaIndex(args.index, dim=len(items[0][1]))
+        added = index.add_many(items)
+        print(f"📥 {added} new, {len(items) - added} updated; {index.count} users indexed")
+        return
+
+    index = PersonaIndex(args.index)
+    if args.command == "query":
+        start = time.perf_counter()
+        results = index.similar_to(args.username.strip('/').split('/')[-1], args.k, args.nprobe)
+        elapsed = (time.perf_counter() - start) * 1000
+        for username, score in results:
+            print(f"{score:.3f}  u/{username}")
+        print(f"⏱️ {len(results)} results from {index.count} users in {elapsed:.1f} ms")
+    elif args.command == "train":
+        index.train()
+        print(f"✅ Trained {len(index.centroids)} centroids over {index.count} users")
+    else:
+        lists = 0 if index.centroids is None else len(index.centroids)
+        print(f"{index.count} users, {index.dim}-d vectors, {lists} centroid lists (trained at {index.trained_at})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# reddit-persona-pro/persona/topic_index.py
+
+import json
+import math
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+from persona.cache import default_cache_dir, deterministic_sample, file_lock
+
+INDEX_FILE = "subreddit_topics.json"
+ENV_FLAG = "PERSONA_TOPIC_PRIOR"
+# Bumped when the entry layout changes; older index files are discarded and rebuilt
+FORMAT_VERSION = 2
+SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "subreddit_topics_seed.json")
+
+# Score assumed for topics a seed entry does not list
+SEED_BACKGROUND = 0.02
+
+TopicClassifier = Callable[[List[str]], List[List[Dict[str, Any]]]]
+
+
+class TopicPriorIndex:
+    """
+    Persistent subreddit -> topic-distribution index used as a prior for
+    zero-shot topic classification.
+
+    For every subreddit the index keeps running sums (and sums of squares)
+    of the per-topic scores seen so far. A subreddit is "confident" once it
+    has enough observations and every topic's score has a small spread; its
+    chunks then take the mean distribution instead of being classified. A
+    small, deterministic fraction of those chunks is still classified so the
+    index keeps refreshing, and old evidence decays once a subreddit passes
+    `max_observations`.
+
+    Curated seed entries are kept apart from the observed statistics: they
+    only shift the mean a subreddit's chunks receive, and never count
+    towards `min_observations`, so every subreddit is classified until it
+    has real evidence behind it.
+
+    Several processes may share one index file (distributed workers on one
+    cache dir): each save merges this process's new observations into the
+    file's current contents under a file lock, instead of overwriting them.
+
+    Args:
+        topics: Candidate topic labels.
+        path: Index file (default: <cache dir>/subreddit_topics.json).
+        seed_path: Curated mapping loaded for subreddits the index has not seen.
+        min_observations: Observations needed before a subreddit can be confident.
+        max_std: Largest per-topic standard deviation still considered confident.
+        refresh_rate: Fraction of confident-subreddit chunks classified anyway.
+        max_observations: Running sums are rescaled to this many observations.
+        seed_weight: Pseudo-observations a seed entry contributes to the mean.
+    """
+
+    def __init__(self, topics: List[str], path: Optional[str] = None, seed_path: Optional[str] = SEED_FILE,
+                 min_observations: int = 20, max_std: float = 0.25, refresh_rate: float = 0.05,
+                 max_observations: int = 500, seed_weight: int = 20, cache_dir: Optional[str] = None):
+        self.topics = list(topics)
+        self.path = path or os.path.join(cache_dir or default_cache_dir(), INDEX_FILE)
+        self.min_observations = min_observations
+        self.max_std = max_std
+        self.refresh_rate = refresh_rate
+        self.max_observations = max_observations
+        self.seed_weight = seed_weight
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.stats = {'chunks': 0, 'from_prior': 0, 'classified': 0, 'refreshed': 0}
+        # Observations made since the last save, merged into the file on save
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        self.entries = self._read()
+        if seed_path and os.path.exists(seed_path):
+            self.seed(seed_path)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('topics') != self.topics or data.get('version') != FORMAT_VERSION:
+            return {}
+        return data.get('subreddits', {})
+
+    @staticmethod
+    def _key(subreddit: str) -> str:
+        return (subreddit or '').strip().lower()
+
+    def seed(self, seed_path: str) -> int:
+        """Add curated {subreddit: {topic: score}} entries for subreddits not yet indexed"""
+        with open(seed_path, encoding='utf-8') as f:
+            mapping = json.load(f)
+        added = 0
+        for subreddit, scores in mapping.items():
+            key = self._key(subreddit)
+            if not key or 'prior' in self.entries.get(key, {}):
+                continue
+            entry = self.entries.setdefault(key, self._empty())
+            entry['prior'] = {topic: scores.get(topic, SEED_BACKGROUND) for topic in self.topics}
+            added += 1
+        self._dirty = self._dirty or bool(added)
+        return added
+
+    def _empty(self) -> Dict[str, Any]:
+        return {'n': 0, 'sum': {t: 0.0 for t in self.topics}, 'sumsq': {t: 0.0 for t in self.topics}}
+
+    # -- queries ---------------------------------------------------------
+
+    def distribution(self, subreddit: str) -> Optional[Dict[str, float]]:
+        """Mean topic scores: observed scores, pulled towards the seed prior if there is one"""
+        entry = self.entries.get(self._key(subreddit))
+        if not entry:
+            return None
+        prior = entry.get('prior')
+        if prior:
+            weight = self.seed_weight
+            return {t: (entry['sum'][t] + prior[t] * weight) / (entry['n'] + weight) for t in self.topics}
+        if not entry['n']:
+            return None
+        return {t: entry['sum'][t] / entry['n'] for t in self.topics}
+
+    def _widest_std(self, entry: Dict[str, Any]) -> float:
+        n = entry['n']
+        return max(math.sqrt(max(entry['sumsq'][t] / n - (entry['sum'][t] / n) ** 2, 0.0)) for t in self.topics)
+
+    def confidence(self, subreddit: str) -> float:
+        """0..1: grows with observations, shrinks as the widest per-topic spread nears max_std"""
+        entry = self.entries.get(self._key(subreddit))
+        if not entry or not entry['n']:
+            return 0.0
+        coverage = min(1.0, entry['n'] / self.min_observations)
+        return coverage * max(0.0, 1.0 - self._widest_std(entry) / self.max_std)
+
+    def is_confident(self, subreddit: str) -> bool:
+        entry = self.entries.get(self._key(subreddit))
+        # Only observed chunks count; a seed prior alone never skips classification
+        return bool(entry) and entry['n'] >= self.min_observations and self._widest_std(entry) <= self.max_std
+
+    def _refresh(self, text: str) -> bool:
+        return deterministic_sample(text, self.refresh_rate)
+
+    # -- updates ---------------------------------------------------------
+
+    def update(self, subreddit: str, topics: List[Dict[str, Any]]) -> None:
+        """Fold one classified chunk into its subreddit's running statistics"""
+        key = self._key(subreddit)
+        if not key or not topics:
+            return
+        scores = {item['topic']: item['score'] for item in topics}
+        observation = {'n': 1, 'sum': {t: scores.get(t, 0.0) for t in self.topics},
+                       'sumsq': {t: scores.get(t, 0.0) ** 2 for t in self.topics}}
+        self._merge(self.entries.setdefault(key, self._empty()), observation)
+        self._merge(self._pending.setdefault(key, self._empty()), observation, forget=False)
+        self._dirty = True
+
+    def _merge(self, entry: Dict[str, Any], delta: Dict[str, Any], forget: bool = True) -> None:
+        """Add `delta`'s running sums to `entry`"""
+        entry['n'] += delta['n']
+        for t in self.topics:
+            entry['sum'][t] += delta['sum'][t]
+            entry['sumsq'][t] += delta['sumsq'][t]
+        if forget and entry['n'] > self.max_observations:
+            # Exponential forgetting: keep the mean, shrink the weight of old evidence
+            scale = self.max_observations / entry['n']
+            entry['n'] *= scale
+            for t in self.topics:
+                entry['sum'][t] *= scale
+                entry['sumsq'][t] *= scale
+
+    def save(self) -> None:
+        """Merge new observations and seeds into the index file (atomic, safe across processes)"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(self.path):
+            entries = self._read()
+            for key, entry in self.entries.items():
+                if 'prior' in entry and 'prior' not in entries.get(key, {}):
+                    entries.setdefault(key, self._empty())['prior'] = entry['prior']
+            for key, delta in self._pending.items():
+                self._merge(entries.setdefault(key, self._empty()), delta)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': FORMAT_VERSION, 'topics': self.topics, 'subreddits': entries}, f)
+            os.replace(tmp, self.path)
+        # Other processes' observations become visible to this one as well
+        self.entries = entries
+        self._pending = {}
+        self._dirty = False
+
+    # -- classification --------------------------------------------------
+
+    def apply(self, texts: List[str], subreddits: List[str], classify: TopicClassifier) -> List[List[Dict[str, Any]]]:
+        """
+        Topic lists for `texts`, classifying only chunks whose subreddit prior is not confident.
+
+        Args:
+            texts: Chunk texts.
+            subreddits: Source subreddit of each chunk.
+            classify: The zero-shot classifier for the chunks that need it.
+
+        Returns:
+            Topic lists in the zero-shot format, one per text.
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(texts)
+        to_classify = []
+        for i, (text, subreddit) in enumerate(zip(texts, subreddits)):
+            if self.is_confident(subreddit):
+                if self._refresh(text):
+                    self.stats['refreshed'] += 1
+                    to_classify.append(i)
+                    continue
+                prior = self.distribution(subreddit)
+                ranked = sorted(prior.items(), key=lambda kv: kv[1], reverse=True)
+                results[i] = [{'topic': t, 'score': s} for t, s in ranked]
+                self.stats['from_prior'] += 1
+            else:
+                to_classify.append(i)
+
+        if to_classify:
+            classified = classify([texts[i] for i in to_classify])
+            for i, topics in zip(to_classify, classified):
+                results[i] = topics
+                self.update(subreddits[i], topics)
+            self.stats['classified'] += len(to_classify)
+
+        self.stats['chunks'] += len(texts)
+        self.save()
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'skip_rate': self.stats['from_prior'] / self.stats['chunks'] if self.stats['chunks'] else 0.0,
+            'subreddits': len(self.entries),
+            'confident_subreddits': sum(self.is_confident(s) for s in self.entries),
+        }
@@ -0,0 +1,71 @@
+import sys
+import os
+import calendar
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import numpy  # noqa: F401
+    from persona.activity import analyze_activity, peak_hours
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Monday 2024-01-01 00:00 UTC
+MONDAY = calendar.timegm((2024, 1, 1, 0, 0, 0))
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def comment(ts, subreddit="python", score=1):
+    return {'body': 'hello', 'subreddit': subreddit, 'created_utc': ts, 'score': score}
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestActivity(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(analyze_activity([], [])['total'], 0)
+        self.assertEqual(analyze_activity([], [{'body': 'no timestamp'}])['total'], 0)
+
+    def test_counts_link_posts_and_comments(self):
+        posts = [{'subreddit': 'pics', 'created_utc': MONDAY + HOUR, 'score': 10}]  # link post, no selftext
+        comments = [comment(MONDAY + 2 * HOUR), comment(MONDAY + 3 * HOUR)]
+        activity = analyze_activity(posts, comments, now=MONDAY + DAY)
+        self.assertEqual((activity['total'], activity['posts'], activity['comments']), (3, 1, 2))
+        self.assertEqual(activity['subreddit_count'], 2)
+        self.assertEqual(activity['subreddits'][0], {
+            'subreddit': 'python', 'items': 2, 'share': 0.667, 'comments': 2,
+            'mean_score': 1.0, 'last_active_utc': float(MONDAY + 3 * HOUR)})
+
+    def test_hour_of_week_heatmap_is_monday_based(self):
+        # Every day at 21:00 UTC for four weeks
+        comments = [comment(MONDAY + d * DAY + 21 * HOUR) for d in range(28)]
+        activity = analyze_activity([], comments, now=MONDAY + 28 * DAY)
+        self.assertEqual(activity['hour_of_week'][0][21], 4)
+        self.assertEqual(sum(map(sum, activity['hour_of_week'])), 28)
+        self.assertEqual(activity['by_weekday']['Mon'], 4)
+        self.assertEqual(activity['weekly_counts'], [7, 7, 7, 7])
+        self.assertEqual(peak_hours(activity['by_hour']), 18)
+        # Perfectly periodic posting
+        self.assertAlmostEqual(activity['burstiness'], -1.0)
+        self.assertEqual(activity['active_day_share'], 1.0)
+
+    def test_rate_uses_full_history_and_bursts(self):
+        # 1500 items: ten bursts of 150 comments a minute apart, a week between bursts
+        comments = [comment(MONDAY + b * 7 * DAY + i * 60, subreddit=f"sub{b % 3}")
+                    for b in range(10) for i in range(150)]
+        activity = analyze_activity([], comments, now=MONDAY + 70 * DAY)
+        self.assertEqual(activity['total'], 1500)
+        self.assertGreater(activity['items_per_day'], 20)
+        self.assertGreater(activity['burstiness'], 0.8)
+        self.assertEqual(activity['peak_day_items'], 150)
+        self.assertEqual(activity['recent_items_per_day'], 600 / 30)
+        self.assertGreater(activity['subreddit_diversity'], 0.9)
+
+    def test_short_histories_are_not_inflated(self):
+        comments = [comment(MONDAY + i * 60) for i in range(5)]
+        self.assertLess(analyze_activity([], comments)['items_per_day'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
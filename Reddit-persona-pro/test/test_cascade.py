@@ -0,0 +1,78 @@
+import sys
+import os
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persona.cascade import Cascade
+
+TOPICS = ["technology", "gaming"]
+
+try:
+    import sklearn  # noqa: F401
+    HAS_SKLEARN = True
+except ImportError:
+    HAS_SKLEARN = False
+
+
+class TestCascade(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cascade = Cascade(TOPICS, cache_dir=self.tmp.name, min_train=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_short_chunks_never_escalate(self):
+        self.assertEqual(self.cascade.sentiment(["lol"]), [{'label': 'NEUTRAL', 'score': 0.95}])
+        self.assertEqual(self.cascade.topics_for(["this."]), [[]])
+        self.assertFalse(self.cascade.needs_entities("lol same"))
+
+    def test_lexicon_decides_clear_sentiment(self):
+        pos, neg, unsure = self.cascade.sentiment([
+            "I love this, it is awesome and amazing",
+            "What a terrible, awful and stupid update",
+            "It is not bad at all, pretty okay really",
+        ])
+        self.assertEqual(pos['label'], 'POSITIVE')
+        self.assertEqual(neg['label'], 'NEGATIVE')
+        self.assertIsNone(unsure)
+
+    def test_entities_escalate_on_proper_nouns(self):
+        self.assertTrue(self.cascade.needs_entities("I flew to Berlin last week"))
+        self.assertTrue(self.cascade.needs_entities("Berlin is cold"))
+        self.assertFalse(self.cascade.needs_entities("The food was good. It was cheap too"))
+
+    def test_report_counts_escalations(self):
+        self.cascade.sentiment(["lol", "It is not bad at all, pretty okay really"])
+        report = self.cascade.report()['sentiment']
+        self.assertEqual(report['total'], 2)
+        self.assertEqual(report['escalation_rate'], 0.5)
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_trains_from_recorded_labels(self):
+        texts = [f"the gpu driver and compiler release {i}" for i in range(10)] + \
+                [f"my speedrun of this boss fight {i}" for i in range(10)]
+        labels = [{'label': 'POSITIVE', 'score': 0.99}] * 10 + [{'label': 'NEGATIVE', 'score': 0.99}] * 10
+        self.cascade.record('sentiment', texts, labels)
+        self.cascade.wait_for_training()
+        self.assertIsNotNone(self.cascade.model)
+        self.assertTrue(os.path.exists(self.cascade.model_path))
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith('.tmp')])
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_lexicon_scores_follow_transformer_scale(self):
+        texts = [f"the gpu driver and compiler release {i}" for i in range(10)] + \
+                [f"my speedrun of this boss fight {i}" for i in range(10)]
+        labels = [{'label': 'POSITIVE', 'score': 0.9}] * 10 + [{'label': 'NEGATIVE', 'score': 0.8}] * 10
+        self.cascade.record('sentiment', texts, labels)
+        self.cascade.wait_for_training()
+        pos, neg, neutral = self.cascade.sentiment([
+            "I love this, it is awesome and amazing", "What a terrible, awful and stupid update", "lol"])
+        self.assertAlmostEqual(pos['score'], 0.9)
+        self.assertAlmostEqual(neg['score'], 0.8)
+        self.assertAlmostEqual(neutral['score'], 0.85)
+
+
+if __name__ == '__main__':
+    unittest.main()
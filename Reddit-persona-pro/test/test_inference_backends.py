@@ -0,0 +1,90 @@
+import sys
+import os
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persona.inference_backends import BACKENDS, MODELS, _artifact_dir, load_pipeline, parity_report
+
+
+class StubAnalyzer:
+    """Returns canned NLPAnalyzer outputs keyed by text"""
+
+    def __init__(self, sentiments, topics, entities):
+        self.sentiments = sentiments
+        self.topics = topics
+        self.entities = entities
+
+    def analyze_sentiments_batch(self, texts):
+        return [self.sentiments[t] for t in texts]
+
+    def extract_topics_batch(self, texts):
+        return [self.topics[t] for t in texts]
+
+    def extract_entities(self, text):
+        return self.entities[text]
+
+
+TEXTS = ["I moved to Berlin", "lol"]
+
+
+def reference():
+    return StubAnalyzer(
+        {"I moved to Berlin": {'label': 'POSITIVE', 'score': 0.9}, "lol": {'label': 'POSITIVE', 'score': 0.7}},
+        {"I moved to Berlin": [{'topic': 'travel', 'score': 0.8}, {'topic': 'food', 'score': 0.1}],
+         "lol": [{'topic': 'gaming', 'score': 0.4}]},
+        {"I moved to Berlin": [{'entity': 'I-LOC', 'word': 'Berlin', 'score': 0.99}], "lol": []},
+    )
+
+
+class TestLoadPipeline(unittest.TestCase):
+    def test_rejects_unknown_backend(self):
+        with self.assertRaises(ValueError) as ctx:
+            load_pipeline("ner", backend="tensorrt")
+        self.assertIn("onnx-int8", str(ctx.exception))
+
+    def test_rejects_unknown_task(self):
+        with self.assertRaises(ValueError):
+            load_pipeline("summarization", backend="pytorch")
+
+    def test_every_task_has_a_pinned_model(self):
+        self.assertEqual(set(MODELS), {"ner", "sentiment", "topic"})
+        self.assertIn("pytorch", BACKENDS)
+
+
+class TestArtifactDir(unittest.TestCase):
+    def test_keyed_by_backend_and_model(self):
+        ner = MODELS["ner"][1]
+        paths = {_artifact_dir("/cache", ner, b) for b in ("quantized", "onnx", "onnx-int8")}
+        paths.add(_artifact_dir("/cache", MODELS["sentiment"][1], "onnx"))
+        self.assertEqual(len(paths), 4)
+
+    def test_model_name_is_a_single_path_component(self):
+        path = _artifact_dir("/cache", "facebook/bart-large-mnli", "onnx")
+        self.assertEqual(os.path.dirname(os.path.dirname(path)), "/cache")
+        self.assertEqual(os.path.basename(path), "facebook--bart-large-mnli")
+
+
+class TestParityReport(unittest.TestCase):
+    def test_identical_outputs(self):
+        report = parity_report(reference(), reference(), TEXTS)
+        self.assertEqual(report['sentiment_label_agreement'], 1.0)
+        self.assertEqual(report['topic_top1_agreement'], 1.0)
+        self.assertEqual(report['entity_jaccard'], 1.0)
+        self.assertEqual(report['sentiment_max_score_diff'], 0.0)
+        self.assertEqual(report['topic_max_score_diff'], 0.0)
+
+    def test_disagreements(self):
+        candidate = reference()
+        candidate.sentiments["lol"] = {'label': 'NEGATIVE', 'score': 0.6}
+        candidate.topics["I moved to Berlin"] = [{'topic': 'food', 'score': 0.5}, {'topic': 'travel', 'score': 0.45}]
+        candidate.entities["I moved to Berlin"] = [{'entity': 'I-ORG', 'word': 'Berlin', 'score': 0.5}]
+        report = parity_report(candidate, reference(), TEXTS)
+        self.assertEqual(report['sentiment_label_agreement'], 0.5)
+        self.assertAlmostEqual(report['sentiment_max_score_diff'], 0.1)
+        self.assertEqual(report['topic_top1_agreement'], 0.5)
+        self.assertAlmostEqual(report['topic_max_score_diff'], 0.4)
+        self.assertEqual(report['entity_jaccard'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
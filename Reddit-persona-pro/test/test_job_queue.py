@@ -0,0 +1,172 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persona.job_queue import JobQueue, SQLiteJobQueue, open_queue
+from persona.distributed import Worker
+
+
+class FakePipeline:
+    """Stands in for PersonaPipeline: build() returns a canned persona or raises"""
+
+    def __init__(self, output_dir, fail_for=()):
+        self.output_dir = output_dir
+        self.fail_for = set(fail_for)
+        self.last_timings = {}
+        self.last_features = None
+        self.last_activity = None
+        self.built = []
+
+    async def warm_up(self):
+        pass
+
+    async def build(self, username, progress=None):
+        self.built.append(username)
+        if username in self.fail_for:
+            raise RuntimeError("fetch failed")
+        if username == "empty":
+            return None
+        return {'name': {'value': username, 'citations': []}}, f"Summary of {username}"
+
+    async def profile_activity(self, username, progress=None):
+        self.built.append(username)
+        self.last_activity = {'total': 3, 'posts': 1, 'comments': 2}
+        return self.last_activity
+
+    async def render(self, username, cited, summary, progress=None):
+        return os.path.join(self.output_dir, f"{username}_persona.pdf")
+
+
+class TestSQLiteJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.db")
+        self.queue = SQLiteJobQueue(self.path)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_enqueue_is_idempotent_per_run(self):
+        self.assertEqual(self.queue.enqueue(["alice", "bob"], "run1"), 2)
+        self.assertEqual(self.queue.enqueue(["bob", "carol", " "], "run1"), 1)
+        self.assertEqual(self.queue.enqueue(["alice"], "run2"), 1)
+        self.assertEqual(self.queue.stats()['counts']['pending'], 4)
+        self.assertEqual(self.queue.stats("run1")['total'], 3)
+
+    def test_jobs_are_claimed_once(self):
+        self.queue.enqueue(["alice", "bob"], "run1")
+        other = SQLiteJobQueue(self.path)
+        try:
+            first = self.queue.claim("w1")
+            second = other.claim("w2")
+            self.assertEqual({first.username, second.username}, {"alice", "bob"})
+            self.assertIsNone(self.queue.claim("w1"))
+        finally:
+            other.close()
+
+    def test_complete_requires_the_lease(self):
+        self.queue.enqueue(["alice"], "run1")
+        job = self.queue.claim("w1", lease_seconds=0.01)
+        time.sleep(0.02)
+        stolen = self.queue.claim("w2")
+        self.assertEqual(stolen.attempts, 2)
+        self.assertFalse(self.queue.complete(job, "late"))
+        self.assertFalse(self.queue.heartbeat(job))
+        self.assertTrue(self.queue.complete(stolen, "ok"))
+        stats = self.queue.stats()
+        self.assertEqual(stats['counts']['done'], 1)
+        self.assertEqual(stats['recent_by_worker'], {"w2": 1})
+
+    def test_failures_retry_until_max_attempts(self):
+        self.queue.enqueue(["alice"], "run1", max_attempts=2)
+        job = self.queue.claim("w1")
+        self.assertTrue(self.queue.fail(job, "boom"))
+        # Retried only after the backoff
+        self.assertIsNone(self.queue.claim("w1"))
+        self.queue.conn.execute("UPDATE jobs SET available_at = 0")
+        job = self.queue.claim("w1")
+        self.assertEqual(job.attempts, 2)
+        self.queue.fail(job, "boom again")
+        self.assertIsNone(self.queue.claim("w1"))
+        self.assertEqual(self.queue.stats()['counts']['failed'], 1)
+        self.assertEqual(self.queue.failures()[0]['error'], "boom again")
+
+    def test_expired_lease_on_last_attempt_fails_the_job(self):
+        self.queue.enqueue(["alice"], "run1", max_attempts=1)
+        self.queue.claim("w1", lease_seconds=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.queue.claim("w2"))
+        self.assertEqual(self.queue.failures()[0]['error'], "lease expired")
+
+    def test_active_workers_ignore_expired_leases(self):
+        self.queue.enqueue(["alice", "bob"], "run1")
+        self.queue.claim("w1", lease_seconds=0.01)
+        self.queue.claim("w2")
+        time.sleep(0.02)
+        self.assertEqual(self.queue.stats()['active_workers'], 1)
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            JobQueue()
+
+    def test_release_does_not_consume_an_attempt(self):
+        self.queue.enqueue(["alice"], "run1", max_attempts=1)
+        job = self.queue.claim("w1")
+        self.assertTrue(self.queue.release(job))
+        self.assertEqual(self.queue.claim("w2").attempts, 1)
+
+    def test_open_queue(self):
+        queue = open_queue("sqlite:///" + os.path.join(self.tmp.name, "other.db"))
+        self.assertIsInstance(queue, SQLiteJobQueue)
+        queue.close()
+        with self.assertRaises(ValueError):
+            open_queue("redis://localhost")
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = SQLiteJobQueue(os.path.join(self.tmp.name, "queue.db"))
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_worker_drains_queue_and_reports_outcomes(self):
+        self.queue.enqueue(["alice", "empty", "broken"], "run1", max_attempts=1)
+        pipeline = FakePipeline(self.tmp.name, fail_for={"broken"})
+        worker = Worker(self.queue, pipeline, worker_id="w1", poll_interval=0.01, exit_when_empty=True)
+        asyncio.run(worker.run())
+
+        self.assertEqual(pipeline.built, ["alice", "empty", "broken"])
+        counts = self.queue.stats()['counts']
+        self.assertEqual((counts['done'], counts['failed']), (2, 1))
+        self.assertIn("fetch failed", self.queue.failures()[0]['error'])
+
+        with open(os.path.join(self.tmp.name, "alice_persona.json"), encoding='utf-8') as f:
+            written = json.load(f)
+        self.assertEqual(written['summary'], "Summary of alice")
+        self.assertEqual(written['run_id'], "run1")
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith('.tmp')])
+
+    def test_activity_only_worker(self):
+        self.queue.enqueue(["alice"], "run1")
+        pipeline = FakePipeline(self.tmp.name)
+        worker = Worker(self.queue, pipeline, worker_id="w1", poll_interval=0.01, exit_when_empty=True,
+                        activity_only=True)
+        asyncio.run(worker.run())
+
+        self.assertEqual(self.queue.stats()['counts']['done'], 1)
+        with open(os.path.join(self.tmp.name, "alice_activity.json"), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['activity']['total'], 3)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "alice_persona.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
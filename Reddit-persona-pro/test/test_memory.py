@@ -0,0 +1,134 @@
+import sys
+import os
+import asyncio
+import gc
+import mmap
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_corpus import generate_user
+from persona.content_preprocessor import ContentPreprocessor
+from persona.memory import PeakMemory, PEAK_MB_PER_USER, current_rss_mb
+from persona.records import ContentItem, compact_listing_item, LISTING_FIELDS
+
+try:
+    from persona.pipeline import PersonaPipeline
+    HAS_PIPELINE = True
+except ImportError:
+    HAS_PIPELINE = False
+
+MAX_ITEMS = 2000  # RedditFetcher returns at most 1000 posts and 1000 comments
+
+
+def raw_listing(n: int, kind: str):
+    """Synthetic listing items padded with the unused fields Reddit returns"""
+    text_key = 'body' if kind == 'comment' else 'selftext'
+    items = []
+    for i in range(n):
+        item = {f'unused_field_{k}': 'x' * 40 for k in range(90)}
+        item.update({
+            text_key: f"Message number {i} about python and gaming. " * (1 + i % 40),
+            'subreddit': f"sub{i % 25}",
+            'created_utc': 1_700_000_000 + i * 3600,
+            'score': i % 97,
+        })
+        items.append(item)
+    return items
+
+
+class TestMemoryBounds(unittest.TestCase):
+    def test_compact_listing_keeps_only_used_fields(self):
+        compact = compact_listing_item(raw_listing(1, 'comment')[0])
+        self.assertTrue(set(compact) <= set(LISTING_FIELDS))
+        self.assertIn('body', compact)
+
+    def test_content_item_is_slotted(self):
+        item = ContentItem(id='x', text='hi', type='comment')
+        self.assertFalse(hasattr(item, '__dict__'))
+
+    def test_single_chunk_items_share_text(self):
+        preprocessor = ContentPreprocessor()
+        _, comments = preprocessor.clean_and_chunk([], raw_listing(5, 'comment'))
+        for item in comments:
+            if len(item.text) < preprocessor.chunk_size:
+                self.assertIs(item.chunks[0], item.text)
+
+    def test_preprocessing_peak_within_budget(self):
+        posts = [compact_listing_item(p) for p in raw_listing(1000, 'post')]
+        comments = [compact_listing_item(c) for c in raw_listing(1000, 'comment')]
+        preprocessor = ContentPreprocessor()
+
+        with PeakMemory() as peak:
+            preprocessor.clean_and_chunk(posts, comments, max_items=100)
+
+        self.assertLessEqual(peak.traced_mb, PEAK_MB_PER_USER)
+
+    @unittest.skipIf(current_rss_mb() is None, "current RSS not readable on this platform")
+    def test_peak_memory_sees_native_allocations(self):
+        with PeakMemory() as peak:
+            block = mmap.mmap(-1, 96 * 1024 * 1024)
+            for offset in range(0, len(block), 1024 * 1024):
+                block[offset:offset + 1024 * 1024] = b'x' * (1024 * 1024)
+            time.sleep(0.05)
+            block.close()
+        self.assertLess(peak.traced_mb, 16)
+        self.assertGreater(peak.rss_growth_mb, 80)
+        self.assertFalse(peak.within())
+
+
+class FakeFetcher:
+    """Serves synthetic listings as large as RedditFetcher ever returns"""
+
+    async def fetch_user_content(self, username):
+        posts, comments = generate_user(username, MAX_ITEMS)
+        return [compact_listing_item(p) for p in posts], [compact_listing_item(c) for c in comments]
+
+
+class StubAnalyzer:
+    backend = "stub"
+    cascade = None
+    topic_index = None
+
+    def analyze_batch(self, texts, subreddits=None, checkpoint=None):
+        return ([{'label': 'POSITIVE', 'score': 0.9} for _ in texts],
+                [[{'topic': 'technology', 'score': 0.8}] for _ in texts],
+                [[{'entity': 'B-LOC', 'word': 'Berlin', 'score': 0.99}] for _ in texts])
+
+
+class StubEngine:
+    def generate_persona(self, metadata):
+        return {'name': {'value': 'bench'}, 'interests': {'value': ['technology']}}
+
+    def add_citations(self, structured, items):
+        return {key: {**value, 'citations': [item.id for item in items[:3]]} for key, value in structured.items()}
+
+    def generate_natural_summary(self, structured):
+        return "summary"
+
+
+@unittest.skipUnless(HAS_PIPELINE, "pipeline dependencies not installed")
+class TestPipelineMemory(unittest.TestCase):
+    def test_per_user_run_within_budget(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            pipeline = PersonaPipeline(output_dir=output_dir, tier="full", fetcher=FakeFetcher(),
+                                       similarity_index=False)
+            # The models' footprint is outside the budget; stub them so the run measures per-user data
+            pipeline.analyzer, pipeline.engine = StubAnalyzer(), StubEngine()
+            try:
+                # A warm worker: one user already processed
+                self.assertIsNotNone(asyncio.run(pipeline.build("warmup")))
+                gc.collect()
+                with PeakMemory() as peak:
+                    built = asyncio.run(pipeline.build("measured"))
+            finally:
+                pipeline.close()
+
+        self.assertIsNotNone(built)
+        self.assertTrue(peak.within(), f"{peak.peak_mb:.1f} MB for one user (budget {PEAK_MB_PER_USER} MB): "
+                                       f"RSS +{peak.rss_growth_mb} MB, traced {peak.traced_mb:.1f} MB")
+
+
+if __name__ == '__main__':
+    unittest.main()
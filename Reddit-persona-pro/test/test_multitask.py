@@ -0,0 +1,130 @@
+import sys
+import os
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from persona.multitask import MultiTaskAnalyzer
+
+try:
+    import sklearn  # noqa: F401
+    HAS_SKLEARN = True
+except ImportError:
+    HAS_SKLEARN = False
+
+TOPICS = ["technology", "gaming", "food"]
+
+
+class StubEncoderAnalyzer(MultiTaskAnalyzer):
+    """MultiTaskAnalyzer with a keyword encoder in place of the transformer"""
+
+    def _load_encoder(self):
+        self.device = "cpu"
+        self.forward_calls = []
+
+    def _forward(self, texts):
+        self.forward_calls.append(list(texts))
+        out = []
+        for text in texts:
+            words = text.lower().split()
+            entities = [{'entity': 'B-LOC', 'word': w, 'score': 0.99} for w in text.split() if w == "Berlin"]
+            embedding = np.array([words.count("love"), words.count("hate"), words.count("python"),
+                                  words.count("game"), words.count("pizza")], dtype=np.float64)
+            out.append((entities, embedding))
+        return out
+
+
+def stub_sentiment(texts):
+    return [{'label': 'NEGATIVE' if 'hate' in t else 'POSITIVE', 'score': 0.97} for t in texts]
+
+
+def stub_topics(texts, topics, multi_label=True):
+    keywords = {"technology": "python", "gaming": "game", "food": "pizza"}
+    results = []
+    for text in texts:
+        scores = {topic: 0.9 if word in text else 0.05 for topic, word in keywords.items()}
+        ranked = sorted(topics, key=scores.get, reverse=True)
+        results.append({'labels': ranked, 'scores': [scores[t] for t in ranked]})
+    return results
+
+
+TRAINING_TEXTS = [f"i {feeling} {thing} {i}" for i in range(6) for feeling in ("love", "hate")
+                  for thing in ("python", "game", "pizza")]
+
+
+class TestMultiTaskAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyzer(self, **kwargs):
+        analyzer = StubEncoderAnalyzer(TOPICS, cache_dir=self.tmp.name, min_records=20, **kwargs)
+        analyzer._fallback = {'sentiment': stub_sentiment, 'topic': stub_topics}
+        return analyzer
+
+    def test_fallback_results_match_the_engine_format(self):
+        analyzer = self.analyzer(auto_fit=False)
+        sentiments, topics, entities = analyzer.analyze_batch(["i love python in Berlin", "i hate pizza"],
+                                                              ["python", "food"])
+        self.assertEqual([s['label'] for s in sentiments], ['POSITIVE', 'NEGATIVE'])
+        self.assertEqual(topics[0][0], {'topic': 'technology', 'score': 0.9})
+        self.assertEqual(entities, [[{'entity': 'B-LOC', 'word': 'Berlin', 'score': 0.99}], []])
+        self.assertEqual(analyzer.labels.count, 4)
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_fit_heads(self):
+        analyzer = self.analyzer(auto_fit=False)
+        self.assertFalse(analyzer.fit_heads(verbose=False))
+        analyzer.analyze_batch(TRAINING_TEXTS)
+        self.assertTrue(analyzer.fit_heads())
+        self.assertTrue(analyzer.has_heads)
+        # The fallback pipelines are released once the heads replace them
+        self.assertEqual(analyzer._fallback, {})
+        self.assertTrue(os.path.exists(analyzer.heads_path))
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith('.tmp')])
+
+        # A new analyzer loads the fitted heads instead of falling back
+        reloaded = StubEncoderAnalyzer(TOPICS, cache_dir=self.tmp.name, min_records=20, auto_fit=False)
+        self.assertTrue(reloaded.has_heads)
+        sentiments, topics, _ = reloaded.analyze_batch(["i love game", "i hate game"])
+        self.assertEqual([s['label'] for s in sentiments], ['POSITIVE', 'NEGATIVE'])
+        for ranked in topics:
+            self.assertEqual(ranked[0]['topic'], 'gaming')
+            self.assertEqual({t['topic'] for t in ranked}, set(TOPICS))
+            self.assertTrue(all(0.0 <= t['score'] <= 1.0 for t in ranked))
+        self.assertEqual(reloaded.labels.count, analyzer.labels.count)
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_heads_share_one_encoding(self):
+        self.analyzer(auto_fit=False).analyze_batch(TRAINING_TEXTS)
+        StubEncoderAnalyzer(TOPICS, cache_dir=self.tmp.name, min_records=20, auto_fit=False).fit_heads()
+
+        analyzer = StubEncoderAnalyzer(TOPICS, cache_dir=self.tmp.name, min_records=20, auto_fit=False)
+        texts = ["i love python in Berlin", "i hate pizza", "i love python in Berlin"]
+        sentiments, topics, entities = analyzer.analyze_batch(texts)
+        self.assertEqual(analyzer.forward_calls, [["i love python in Berlin", "i hate pizza"]])
+        self.assertEqual((len(sentiments), len(topics), len(entities)), (3, 3, 3))
+        self.assertEqual(entities[0], [{'entity': 'B-LOC', 'word': 'Berlin', 'score': 0.99}])
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_fit_encodes_only_the_latest_labels(self):
+        self.analyzer(auto_fit=False).analyze_batch(TRAINING_TEXTS)
+        analyzer = StubEncoderAnalyzer(TOPICS, cache_dir=self.tmp.name, min_records=20, auto_fit=False,
+                                       max_fit_records=24)
+        self.assertTrue(analyzer.fit_heads())
+        self.assertEqual(analyzer.forward_calls, [TRAINING_TEXTS[-24:]] * 2)
+
+    @unittest.skipUnless(HAS_SKLEARN, "scikit-learn not installed")
+    def test_heads_are_fitted_in_the_background(self):
+        analyzer = self.analyzer()
+        analyzer.analyze_batch(TRAINING_TEXTS)
+        analyzer.wait_for_fit(timeout=30)
+        self.assertTrue(analyzer.has_heads)
+
+
+if __name__ == '__main__':
+    unittest.main()
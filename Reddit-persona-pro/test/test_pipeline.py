@@ -0,0 +1,97 @@
+import sys
+import os
+import asyncio
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_corpus import generate_user
+from persona.records import compact_listing_item
+
+try:
+    from persona.pipeline import PersonaPipeline
+    HAS_PIPELINE = True
+except ImportError:
+    HAS_PIPELINE = False
+
+
+class FakeFetcher:
+    async def fetch_user_content(self, username):
+        posts, comments = generate_user(username, 50)
+        return [compact_listing_item(p) for p in posts], [compact_listing_item(c) for c in comments]
+
+
+class SlowAnalyzer:
+    """Blocks like a model forward pass; records when each batch finished"""
+
+    backend = "stub"
+    cascade = None
+    topic_index = None
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.finished = []
+
+    def analyze_batch(self, texts, subreddits=None, checkpoint=None):
+        time.sleep(self.seconds)
+        self.finished.append(time.perf_counter())
+        if checkpoint:
+            checkpoint()
+        return ([{'label': 'POSITIVE', 'score': 0.9} for _ in texts],
+                [[{'topic': 'technology', 'score': 0.8}] for _ in texts],
+                [[] for _ in texts])
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_persona(self, metadata):
+        self.calls += 1
+        return {'name': {'value': 'stub'}}
+
+    def add_citations(self, structured, items):
+        return structured
+
+    def generate_natural_summary(self, structured):
+        return "summary"
+
+
+@unittest.skipUnless(HAS_PIPELINE, "pipeline dependencies not installed")
+class TestCancellation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pipeline = PersonaPipeline(output_dir=self.tmp.name, fetcher=FakeFetcher(), similarity_index=False)
+        self.analyzer, self.engine = SlowAnalyzer(0.1), RecordingEngine()
+        self.pipeline.analyzer, self.pipeline.engine = self.analyzer, self.engine
+
+    def tearDown(self):
+        self.pipeline.close()
+        self.tmp.cleanup()
+
+    def test_cancel_waits_for_the_running_stage(self):
+        async def scenario():
+            stages = []
+            task = asyncio.ensure_future(self.pipeline.build("alice", progress=lambda u, s, i, n: stages.append(s)))
+            while "analyze" not in stages:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            cancelled_at = time.perf_counter()
+            cancelled_batches = len(self.analyzer.finished)
+            # The next job runs normally and is not queued behind abandoned work
+            return cancelled_at, cancelled_batches, await self.pipeline.build("alice")
+
+        cancelled_at, cancelled_batches, built = asyncio.run(scenario())
+        self.assertTrue(all(t <= cancelled_at for t in self.analyzer.finished[:cancelled_batches]))
+        # The cancel landed between mini-batches, not after the whole analysis
+        self.assertLess(cancelled_batches, len(self.analyzer.finished) - cancelled_batches)
+        # The cancelled run never reached the persona stage
+        self.assertEqual(self.engine.calls, 1)
+        self.assertEqual(built[1], "summary")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persona.records import ContentItem
+from persona.sampler import ContentSampler, SAMPLING_TIERS
+
+
+def make_item(i: int, subreddit: str, text: str = None, score: int = 1, kind: str = 'comment') -> ContentItem:
+    text = text or f"comment {i} " + "word " * (i % 60)
+    return ContentItem(
+        id=str(i), text=text.strip(), type=kind, subreddit=subreddit,
+        created_utc=1_600_000_000 + i * 86400, score=score, chunks=(text.strip(),)
+    )
+
+
+class TestContentSampler(unittest.TestCase):
+    def test_respects_chunk_budget(self):
+        items = [make_item(i, f"sub{i % 30}") for i in range(1000)]
+        sampler = ContentSampler(max_chunks=50, min_gain=0.0)
+        selected, chunks = sampler.sample(items, [])
+        self.assertLessEqual(len(chunks), 50)
+        self.assertEqual(sampler.last_stats['chunks'], len(chunks))
+
+    def test_respects_token_budget(self):
+        items = [make_item(i, "python", text="x" * 800) for i in range(100)]
+        sampler = ContentSampler(max_chunks=100, max_tokens=1000, min_gain=0.0)
+        sampler.sample(items, [])
+        self.assertLessEqual(sampler.last_stats['tokens'], 1000)
+
+    def test_drops_duplicates(self):
+        items = [make_item(i, "python", text="Same copy pasted reply!") for i in range(20)]
+        selected, _ = ContentSampler().sample([], items)
+        self.assertEqual(len(selected), 1)
+
+    def test_covers_small_subreddits_over_viral_outliers(self):
+        viral = [make_item(i, "funny", score=50_000) for i in range(200)]
+        niche = [make_item(1000 + i, f"niche{i}") for i in range(5)]
+        selected, _ = ContentSampler(max_chunks=20).sample([], viral + niche)
+        subreddits = {item.subreddit for item in selected}
+        self.assertTrue({f"niche{i}" for i in range(5)} <= subreddits)
+
+    def test_stops_when_coverage_saturates(self):
+        items = [make_item(i, "python", text=f"short reply {i}") for i in range(500)]
+        sampler = ContentSampler(max_chunks=300)
+        selected, _ = sampler.sample([], items)
+        self.assertLess(len(selected), 300)
+
+    def test_unknown_tier(self):
+        with self.assertRaises(ValueError):
+            ContentSampler.for_tier("platinum")
+        for tier in SAMPLING_TIERS:
+            self.assertIsInstance(ContentSampler.for_tier(tier), ContentSampler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import numpy as np
+    from persona.similarity import PersonaIndex, feature_dim, persona_features
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from persona.records import ContentItem
+
+TOPICS = ["technology", "gaming", "food"]
+
+
+def metadata(topic, subreddit, label="POSITIVE", n=20):
+    items = [ContentItem(f"c{i}", f"Talking about {topic} again! Is it good?", "comment", subreddit)
+             for i in range(n)]
+    return {
+        'texts': [item.text for item in items],
+        'topics': [{'topic': t, 'score': 0.9 if t == topic else 0.05} for _ in items for t in TOPICS],
+        'sentiments': [{'label': label, 'score': 0.95} for _ in items],
+        'posts': [],
+        'comments': items,
+    }
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestPersonaFeatures(unittest.TestCase):
+    def test_vector_shape_and_norm(self):
+        vector = persona_features(metadata("gaming", "games"), TOPICS)
+        self.assertEqual(vector.shape, (feature_dim(TOPICS),))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+    def test_similar_users_score_higher(self):
+        gamer = persona_features(metadata("gaming", "games"), TOPICS)
+        other_gamer = persona_features(metadata("gaming", "pcgaming"), TOPICS)
+        cook = persona_features(metadata("food", "cooking", label="NEGATIVE"), TOPICS)
+        self.assertGreater(float(gamer @ other_gamer), float(gamer @ cook))
+
+    def test_empty_metadata(self):
+        vector = persona_features({}, TOPICS)
+        self.assertEqual(vector.shape, (feature_dim(TOPICS),))
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestPersonaIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index")
+        rng = np.random.default_rng(0)
+        # Four well-separated clusters of users
+        centers = rng.normal(size=(4, 16))
+        self.vectors = []
+        for i in range(400):
+            v = centers[i % 4] + 0.1 * rng.normal(size=16)
+            self.vectors.append((f"user{i}", (v / np.linalg.norm(v)).astype(np.float32)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_requires_dim_for_new_index(self):
+        with self.assertRaises(ValueError):
+            PersonaIndex(self.path)
+
+    def test_exact_query_below_train_min(self):
+        index = PersonaIndex(self.path, dim=16, train_min=10000)
+        self.assertEqual(index.add_many(self.vectors[:100]), 100)
+        results = index.similar_to("user0", k=5)
+        self.assertEqual(len(results), 5)
+        self.assertNotIn("user0", [name for name, _ in results])
+        self.assertTrue(all(int(name[4:]) % 4 == 0 for name, _ in results))
+
+    def test_reinsert_overwrites_in_place(self):
+        index = PersonaIndex(self.path, dim=16)
+        index.add_many(self.vectors[:10])
+        self.assertFalse(index.add("user3", self.vectors[5][1]))
+        self.assertEqual(index.count, 10)
+        self.assertTrue(np.allclose(index.vector("user3"), self.vectors[5][1]))
+
+    def test_index_grows_and_persists(self):
+        index = PersonaIndex(self.path, dim=16, train_min=200)
+        for name, vector in self.vectors:
+            index.add(name, vector)
+        self.assertEqual(index.trained_at, 200)
+        self.assertIsNotNone(index.centroids)
+
+        reopened = PersonaIndex(self.path, train_min=200)
+        self.assertEqual(reopened.count, 400)
+        self.assertEqual(reopened.dim, 16)
+        results = reopened.similar_to("user1", k=10, nprobe=2)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(int(name[4:]) % 4 == 1 for name, _ in results))
+
+    def test_rejects_other_feature_versions(self):
+        PersonaIndex(self.path, dim=16).add_many(self.vectors[:5])
+        meta_path = os.path.join(self.path, "meta.json")
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['feature_version'] -= 1
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        with self.assertRaises(ValueError):
+            PersonaIndex(self.path)
+
+    def test_interrupted_insert_is_discarded(self):
+        index = PersonaIndex(self.path, dim=16)
+        index.add_many(self.vectors[:5])
+        with open(os.path.join(self.path, "ids.txt"), 'a', encoding='utf-8') as f:
+            f.write("ghost\n")
+        reopened = PersonaIndex(self.path)
+        self.assertNotIn("ghost", reopened)
+        reopened.add(*self.vectors[5])
+        self.assertEqual(PersonaIndex(self.path).ids[-1], "user5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import sys
+import os
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_corpus import generate_user, listing_page
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_sizes_and_shape(self):
+        posts, comments = generate_user("alice", 300)
+        self.assertEqual(len(posts) + len(comments), 300)
+        self.assertTrue(all('selftext' in p and 'subreddit' in p for p in posts))
+        self.assertTrue(all('body' in c and 'created_utc' in c for c in comments))
+
+    def test_deterministic(self):
+        self.assertEqual(generate_user("bob", 50, seed=3), generate_user("bob", 50, seed=3))
+        self.assertNotEqual(generate_user("bob", 50, seed=3), generate_user("bob", 50, seed=4))
+
+    def test_listing_pagination(self):
+        _, comments = generate_user("carol", 250)
+        seen, after = [], None
+        while True:
+            page = listing_page(comments, after)
+            seen.extend(child['data'] for child in page['data']['children'])
+            after = page['data']['after']
+            if not after:
+                break
+        self.assertEqual(seen, comments)
+
+
+if __name__ == '__main__':
+    unittest.main()
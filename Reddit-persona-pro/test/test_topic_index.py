@@ -0,0 +1,111 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persona.topic_index import TopicPriorIndex
+
+TOPICS = ["technology", "gaming", "food"]
+
+
+def gaming_classifier(calls):
+    def classify(texts):
+        calls.append(list(texts))
+        return [[{'topic': 'gaming', 'score': 0.9}, {'topic': 'technology', 'score': 0.2},
+                 {'topic': 'food', 'score': 0.01}] for _ in texts]
+    return classify
+
+
+class TestTopicPriorIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_index(self, **kwargs):
+        return TopicPriorIndex(TOPICS, path=self.path, seed_path=None, refresh_rate=0.0, **kwargs)
+
+    def test_unknown_subreddit_is_classified_and_learned(self):
+        index = self.make_index(min_observations=3)
+        calls = []
+        for i in range(3):
+            index.apply([f"text {i}"], ["Games"], gaming_classifier(calls))
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(index.is_confident("games"))
+
+        topics = index.apply(["another one"], ["games"], gaming_classifier(calls))[0]
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(topics[0]['topic'], 'gaming')
+        self.assertAlmostEqual(topics[0]['score'], 0.9)
+
+    def test_noisy_subreddit_stays_unconfident(self):
+        index = self.make_index(min_observations=2, max_std=0.1)
+        index.update("askreddit", [{'topic': 'food', 'score': 0.95}])
+        index.update("askreddit", [{'topic': 'food', 'score': 0.05}])
+        self.assertFalse(index.is_confident("askreddit"))
+
+    def test_seed_and_persistence(self):
+        seed = os.path.join(self.tmp.name, "seed.json")
+        with open(seed, 'w', encoding='utf-8') as f:
+            json.dump({"Cooking": {"food": 0.9}}, f)
+        index = TopicPriorIndex(TOPICS, path=self.path, seed_path=seed, refresh_rate=0.0, min_observations=3)
+        # A seed alone supplies the mean but never skips classification
+        self.assertFalse(index.is_confident("cooking"))
+        self.assertEqual(index.confidence("cooking"), 0.0)
+        self.assertAlmostEqual(index.distribution("cooking")["food"], 0.9)
+
+        calls = []
+        index.apply(["a"], ["cooking"], gaming_classifier(calls))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(index.entries["cooking"]['n'], 1)
+        # One observation of 0.01 against 20 pseudo-observations of 0.9
+        self.assertAlmostEqual(index.distribution("cooking")["food"], (0.01 + 0.9 * 20) / 21)
+        index.save()
+
+        reloaded = TopicPriorIndex(TOPICS, path=self.path, seed_path=None)
+        self.assertIn("prior", reloaded.entries["cooking"])
+        self.assertEqual(reloaded.entries["cooking"]['n'], 1)
+
+    def test_seed_does_not_count_as_observations(self):
+        seed = os.path.join(self.tmp.name, "seed.json")
+        with open(seed, 'w', encoding='utf-8') as f:
+            json.dump({"Cooking": {"food": 0.9}}, f)
+        index = TopicPriorIndex(TOPICS, path=self.path, seed_path=seed, refresh_rate=0.0, min_observations=2)
+        calls = []
+        for i in range(2):
+            index.apply([f"text {i}"], ["cooking"], gaming_classifier(calls))
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(index.is_confident("cooking"))
+
+    def test_concurrent_writers_merge(self):
+        first, second = self.make_index(), self.make_index()
+        calls = []
+        first.apply(["a", "b"], ["games", "cooking"], gaming_classifier(calls))
+        second.apply(["c"], ["games"], gaming_classifier(calls))
+        first.apply(["d"], ["games"], gaming_classifier(calls))
+
+        merged = self.make_index()
+        self.assertEqual(merged.entries["games"]['n'], 3)
+        self.assertEqual(merged.entries["cooking"]['n'], 1)
+        self.assertFalse(os.path.exists(self.path + ".lock"))
+        # The last writer also picked up the other process's observations
+        self.assertEqual(first.entries["games"]['n'], 3)
+
+    def test_cache_dir(self):
+        index = TopicPriorIndex(TOPICS, seed_path=None, cache_dir=self.tmp.name)
+        self.assertEqual(os.path.dirname(index.path), self.tmp.name)
+
+    def test_report_skip_rate(self):
+        index = self.make_index(min_observations=1)
+        calls = []
+        index.apply(["a", "b"], ["games", "games"], gaming_classifier(calls))
+        index.apply(["c", "d"], ["games", "games"], gaming_classifier(calls))
+        self.assertEqual(index.report()['skip_rate'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()